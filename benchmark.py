@@ -0,0 +1,188 @@
+import argparse
+import os
+import pickle
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from encryption_module import (
+    apply_md5_diffusion,
+    apply_sha256_diffusion,
+    apply_hybrid_diffusion,
+    reverse_hybrid_diffusion,
+    reverse_sha256_diffusion,
+    reverse_md5_diffusion,
+)
+from utils.bitplane_ops import (
+    permute_axis,
+    construct_3d_cube,
+    extract_images_from_cube,
+    scramble_x_planes,
+    scramble_y_planes,
+    scramble_z_planes,
+)
+from utils.hash_utils import CIPHER_SUITES
+from utils.shm_engine import SharedMemoryEngine
+from utils.tuning import ACTIVE_PROFILE
+
+
+def throughput(fn, n_bytes, repeats):
+    """Best-of-``repeats`` throughput of ``fn`` in MB/s"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n_bytes / best / 1e6
+
+
+def bench_suites(data, chunk_size, repeats):
+    """Report per-layer diffusion throughput for every cipher suite"""
+    rows = []
+    for suite_id, suite_cls in CIPHER_SUITES.items():
+        H_md5, H_sha = suite_cls.group_digests(data)
+        suite = suite_cls(H_md5, H_sha)
+        layer_1 = apply_md5_diffusion(data, H_md5, chunk_size, suite)
+        layer_2 = apply_sha256_diffusion(layer_1, H_sha, chunk_size, suite)
+        layer_3 = apply_hybrid_diffusion(layer_2, H_md5, H_sha, suite)
+        cases = {
+            'xor layer': lambda: apply_md5_diffusion(data, H_md5, chunk_size, suite),
+            'add layer': lambda: apply_sha256_diffusion(layer_1, H_sha, chunk_size, suite),
+            'hybrid layer': lambda: apply_hybrid_diffusion(layer_2, H_md5, H_sha, suite),
+            'reverse hybrid': lambda: reverse_hybrid_diffusion(layer_3, H_md5, H_sha, suite),
+            'reverse add': lambda: reverse_sha256_diffusion(layer_2, H_sha, chunk_size, suite),
+            'reverse xor': lambda: reverse_md5_diffusion(layer_1, H_md5, chunk_size, suite),
+        }
+        for name, fn in cases.items():
+            rows.append((suite_id, name, throughput(fn, len(data), repeats)))
+    return rows
+
+
+def _pickled_permute(block, perm, axis):
+    return permute_axis(block, perm, axis)
+
+
+def bench_shared_memory(shape, workers):
+    """
+    Bytes crossing the process boundary per job: pickling cube blocks to a
+    pool vs. passing shared-memory descriptors to the engine
+    """
+    cube = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    perm = np.random.default_rng(1).permutation(shape[0])
+    n_jobs = workers * 4
+    blocks = np.array_split(cube, n_jobs, axis=1)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(_pickled_permute, blocks, [perm] * n_jobs, [0] * n_jobs))
+        pickled_time = time.perf_counter() - start
+    pickled_bytes = sum(len(pickle.dumps((b, perm, 0))) + len(pickle.dumps(r))
+                        for b, r in zip(blocks, results))
+
+    with SharedMemoryEngine(workers, block_size=1) as engine:
+        src = engine.share(cube)
+        dst = engine.empty(cube.shape)
+        engine.permute_axis(src, dst, perm, 0)  # warm up the workers
+        engine.bytes_sent = engine.tasks_sent = 0
+        start = time.perf_counter()
+        engine.permute_axis(src, dst, perm, 0)
+        shm_time = time.perf_counter() - start
+        shm_jobs, shm_bytes = engine.tasks_sent, engine.bytes_sent
+
+    return [
+        ('pickled pool', pickled_bytes / n_jobs, pickled_time),
+        ('shared memory', shm_bytes / shm_jobs, shm_time),
+    ]
+
+
+def bench_hybrid_scan(data, workers, repeats):
+    """
+    Forward hybrid layer: serial chain vs. the engine's parallel prefix scan
+    (the outputs are checked to be identical)
+    """
+    suite_cls = CIPHER_SUITES['md5-sha256']
+    suite = suite_cls(*suite_cls.group_digests(data))
+    expected = apply_hybrid_diffusion(data, None, None, suite)
+    rows = [('serial chain', throughput(lambda: apply_hybrid_diffusion(data, None, None, suite),
+                                        len(data), repeats))]
+    with SharedMemoryEngine(workers) as engine:
+        tables = suite.hybrid_tables()
+        if engine.forward_hybrid(data, *tables) != expected:
+            raise AssertionError("parallel scan output differs from the serial chain")
+        rows.append(('parallel scan', throughput(lambda: engine.forward_hybrid(data, *tables),
+                                                 len(data), repeats)))
+    return rows
+
+
+def bench_layouts(shape, repeats):
+    """
+    Seconds per stage for the interleaved (H x W x N) and planar (N x H x W)
+    cube layouts on ``shape`` = (H, W, N)
+    """
+    h, w, n = shape
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (h, w), dtype=np.uint8) for _ in range(n)]
+    seq = rng.random(max(h, w, n))
+
+    def best(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    rows = []
+    for layout in ('interleaved', 'planar'):
+        cube = construct_3d_cube(images, layout)
+        scrambled = scramble_z_planes(cube, seq, layout=layout)
+        cases = {
+            'construct': lambda: construct_3d_cube(images, layout),
+            'scramble z': lambda: scramble_z_planes(cube, seq, layout=layout),
+            'scramble y': lambda: scramble_y_planes(cube, seq, layout=layout),
+            'scramble x': lambda: scramble_x_planes(cube, seq, layout=layout),
+            'extract': lambda: [np.ascontiguousarray(img) for img in
+                                extract_images_from_cube(scrambled, images, layout)],
+        }
+        for name, fn in cases.items():
+            rows.append((layout, name, best(fn)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the encryption engine")
+    parser.add_argument('--size', type=int, default=1 << 20, help="bytes per run")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--cube', type=int, nargs=3, default=[1024, 1024, 64],
+                        metavar=('H', 'W', 'N'), help="cube shape for the engine benchmark")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--layout-cube', type=int, nargs=3, default=[256, 256, 512],
+                        metavar=('H', 'W', 'N'), help="cube shape for the layout benchmark")
+    args = parser.parse_args()
+
+    data = np.random.default_rng(0).integers(0, 256, args.size, dtype=np.uint8).tobytes()
+    chunk_size = ACTIVE_PROFILE['chunk_size']
+
+    print(f"📊 Diffusion throughput ({args.size} bytes, chunk_size={chunk_size})")
+    print(f"{'suite':<12} {'stage':<16} {'MB/s':>10}")
+    for suite_id, name, mb_s in bench_suites(data, chunk_size, args.repeats):
+        print(f"{suite_id:<12} {name:<16} {mb_s:10.2f}")
+
+    print(f"\n📊 X-plane scramble of a {tuple(args.cube)} cube on {args.workers} workers")
+    print(f"{'engine':<14} {'bytes/job':>14} {'seconds':>10}")
+    for name, bytes_per_job, seconds in bench_shared_memory(tuple(args.cube), args.workers):
+        print(f"{name:<14} {bytes_per_job:14,.0f} {seconds:10.3f}")
+
+    print(f"\n📊 Forward hybrid layer ({args.size} bytes) on {args.workers} workers")
+    print(f"{'engine':<14} {'MB/s':>10}")
+    for name, mb_s in bench_hybrid_scan(data, args.workers, args.repeats):
+        print(f"{name:<14} {mb_s:10.2f}")
+
+    print(f"\n📊 Cube layouts on {tuple(args.layout_cube)} (H, W, N)")
+    print(f"{'layout':<12} {'stage':<12} {'seconds':>10}")
+    for layout, name, seconds in bench_layouts(tuple(args.layout_cube), args.repeats):
+        print(f"{layout:<12} {name:<12} {seconds:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
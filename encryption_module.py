@@ -1,11 +1,30 @@
-from utils.hash_utils import md5_hash, sha256_hash, hash_to_bytes
+from utils.hash_utils import (
+    hash_to_bytes, Md5Sha256Suite, DEFAULT_SUITE, get_suite
+)
+from utils.container import (
+    pack_container, open_container, write_container, read_container, read_header,
+    check_key, derive_mac_key, segment_context, segment_tag_table, verify_segment,
+    file_fingerprint, AuthenticationError, FORMAT_VERSION, SEGMENT_TAG_SIZE
+)
+from utils.output_cache import key_id, group_fingerprint, cipher_version, cache_key
+from utils.tuning import ACTIVE_PROFILE, DEFAULT_PROFILE
+from utils.jit_kernels import sine_sequences, hybrid_chain
 from utils.chaotic_maps import *
 from utils.bitplane_ops import *
 from utils.image_utils import *
-from math import sin, pi
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
 import numpy as np
 from utils.bitplane_ops import (
     construct_3d_cube,
+    cube_dims,
+    LAYOUT_AXES,
+    PERM_ARGSORT,
+    PERM_KEYED,
+    axis_permutation,
+    inverse_permutation,
     bytes_to_cube,
     scramble_x_planes,
     scramble_y_planes,
@@ -16,6 +35,10 @@ from utils.bitplane_ops import (
     reverse_scramble_z_planes,
 )
 
+CONTAINER_NAME = "encrypted_group.miec"
+SHARD_MANIFEST = "manifest.json"
+SHARDED_MODE_VERSION = 1
+
 # Modified Multiple-Image Encryption Algorithm
 # Using MD5 + SHA-256 Hybrid Hashing
 def concatenate(images, password):
@@ -42,18 +65,23 @@ def concatenate(images, password):
     except Exception as e:
         raise ValueError(f"Error concatenating data: {str(e)}")
 
-def modified_encryption(images, password):
+def derive_keys(images, password, suite=DEFAULT_SUITE):
     """
-    Encrypt multiple images using hybrid hash-based approach.
+    Derive the group key dictionary from all image data + password.
     """
-    print("Phase 1: Hybrid Key Generation")
     data = concatenate(images, password)
-    H_md5 = md5_hash(data)
-    H_sha = sha256_hash(data)
+    H_md5, H_sha = get_suite(suite).group_digests(data)
+    return keys_from_digests(H_md5, H_sha)
+
+
+def keys_from_digests(H_md5, H_sha):
+    """
+    Build the key dictionary (digests + chaotic parameters) from two digests.
+    """
     x0, y0, z0, p0, q0 = extract_initial_values(H_md5)
     a, b, c, mu = extract_control_params(H_sha)
 
-    keys = {
+    return {
         'H_md5': H_md5,
         'H_sha': H_sha,
         'x0': x0, 'y0': y0, 'z0': z0,
@@ -61,24 +89,63 @@ def modified_encryption(images, password):
         'a': a, 'b': b, 'c': c, 'mu': mu
     }
 
+def modified_encryption(images, password, profile=None, suite=DEFAULT_SUITE, keys=None,
+                        engine=None, segment_size=None, layout='interleaved',
+                        perm_mode=PERM_ARGSORT):
+    """
+    Encrypt multiple images using hybrid hash-based approach.
+    Chunk size, worker count and block size come from ``profile``
+    (defaults to the tuned profile loaded at startup); ``suite`` selects
+    the hash cipher suite (see utils.hash_utils.CIPHER_SUITES). Pass
+    ``keys`` from derive_keys to skip hashing the group a second time.
+    With a SharedMemoryEngine, scrambling and the hybrid layer (as a
+    parallel prefix scan) run on its worker processes.
+    ``segment_size`` selects the seekable layout (chains restart per segment).
+    ``layout`` selects the cube layout ('interleaved' H×W×N or 'planar'
+    N×H×W); the ciphertext depends on it, so decrypt with the same one.
+    ``perm_mode`` selects how scramble permutations are generated (see
+    utils.bitplane_ops.PERMUTATION_MODES) and must also match.
+    """
+    profile = profile or ACTIVE_PROFILE
+    chunk_size = profile['chunk_size']
+    tuning = {'block_size': profile['block_size'], 'workers': profile['workers'],
+              'layout': layout, 'perm_mode': perm_mode}
+    print("Phase 1: Hybrid Key Generation")
+    keys = keys or derive_keys(images, password, suite)
+    H_md5, H_sha = keys['H_md5'], keys['H_sha']
+    keyed_suite = get_suite(suite)(H_md5, H_sha)
+
     # Phase 2: 3D Bit-Plane Scrambling
     print("Phase 2: 3D Bit-Plane Scrambling")
-    cube_3d = construct_3d_cube(images)
-    h, w, d = cube_3d.shape
-    X1, X2, X3 = generate_3d_sine_sequences(x0, y0, z0, a, b, c, h)
-    Y, Z = generate_2d_lasm_sequences(p0, q0, mu, h)
-    cube_scrambled = scramble_z_planes(cube_3d, X1)
-    cube_scrambled = scramble_y_planes(cube_scrambled, X2)
-    cube_scrambled = scramble_x_planes(cube_scrambled, X3)
+    cube_3d = construct_3d_cube(images, layout)
+    h, w, d = cube_dims(cube_3d, layout)
+    # One sequence per axis; each scramble uses the prefix it needs, so
+    # groups deeper or wider than they are tall still work
+    seq_len = max(h, w, d)
+    X1, X2, X3 = permutation_sources(keys, seq_len, perm_mode)
+    if perm_mode == PERM_ARGSORT:
+        Y, Z = generate_2d_lasm_sequences(keys['p0'], keys['q0'], keys['mu'], seq_len)
+    if engine is not None:
+        perms = [axis_permutation(X, n, perm_mode) for X, n in zip((X1, X2, X3), (d, w, h))]
+        cube_scrambled = engine.scramble_cube(cube_3d, perms, layout=layout)
+    else:
+        cube_scrambled = scramble_z_planes(cube_3d, X1, **tuning)
+        cube_scrambled = scramble_y_planes(cube_scrambled, X2, **tuning)
+        cube_scrambled = scramble_x_planes(cube_scrambled, X3, **tuning)
 
     # Phase 3: Multi-Layer Hash Diffusion
     print("Phase 3: Multi-Layer Hash Diffusion")
     byte_array = cube_to_bytes(cube_scrambled)
-    byte_array_1 = apply_md5_diffusion(byte_array, H_md5)
-    byte_array_2 = apply_sha256_diffusion(byte_array_1, H_sha)
-    encrypted_bytes = apply_hybrid_diffusion(byte_array_2, H_md5, H_sha)
-    encrypted_cube = bytes_to_cube(encrypted_bytes, (h, w, d))
-    encrypted_images = extract_images_from_cube(encrypted_cube, images)
+    byte_array_1 = apply_md5_diffusion(byte_array, H_md5, chunk_size, keyed_suite,
+                                       segment_size)
+    byte_array_2 = apply_sha256_diffusion(byte_array_1, H_sha, chunk_size, keyed_suite,
+                                          segment_size)
+    if engine is not None:
+        encrypted_bytes = engine.forward_hybrid(byte_array_2, *keyed_suite.hybrid_tables())
+    else:
+        encrypted_bytes = apply_hybrid_diffusion(byte_array_2, H_md5, H_sha, keyed_suite)
+    encrypted_cube = bytes_to_cube(encrypted_bytes, cube_3d.shape)
+    encrypted_images = extract_images_from_cube(encrypted_cube, images, layout)
 
     return encrypted_images, keys
 
@@ -113,183 +180,638 @@ def extract_control_params(H_sha):
 
 def generate_3d_sine_sequences(x0, y0, z0, a, b, c, length):
     """Generate chaotic sequences from 3D Sine Map"""
-    X1, X2, X3 = [], [], []
-    x, y, z = x0, y0, z0
-    
-    # Discard first 1000 iterations
-    for _ in range(1000):
-        x = a * sin(pi * (1-x)) * sin(pi * (1-y)) % 1
-        y = b * sin(pi * (1-y)) * sin(pi * (1-z)) % 1
-        z = c * sin(pi * (1-z)) * sin(pi * (1-x)) % 1
-    
-    # Generate sequences
-    for _ in range(length):
-        x = a * sin(pi * (1-x)) * sin(pi * (1-y)) % 1
-        y = b * sin(pi * (1-y)) * sin(pi * (1-z)) % 1
-        z = c * sin(pi * (1-z)) * sin(pi * (1-x)) % 1
-        X1.append(x)
-        X2.append(y)
-        X3.append(z)
-    
+    # Numba-compiled when available, bit-identical Python loop otherwise
+    X1, X2, X3 = sine_sequences(x0, y0, z0, a, b, c, length).tolist()
     return X1, X2, X3
 
 
-def apply_md5_diffusion(byte_array, H_md5):
-    """Apply MD5-based XOR diffusion"""
-    if not isinstance(byte_array, (bytes, bytearray)):
+def _as_uint8(byte_array):
+    """View any bytes-like / list input as a flat uint8 array"""
+    if isinstance(byte_array, np.ndarray):
+        return byte_array.astype(np.uint8, copy=False).reshape(-1)
+    if not isinstance(byte_array, (bytes, bytearray, memoryview)):
         byte_array = bytes(byte_array)
-    result = bytearray(byte_array)
-    chunk_size = 1024
+    return np.frombuffer(byte_array, dtype=np.uint8)
+
+
+def hybrid_table_arrays(suite):
+    """The suite's hybrid M/S rows as (256, 16) and (256, 32) uint8 arrays"""
+    M_table, S_table = suite.hybrid_tables()
+    return (np.frombuffer(b''.join(M_table), dtype=np.uint8).reshape(256, 16),
+            np.frombuffer(b''.join(S_table), dtype=np.uint8).reshape(256, 32))
+
+
+def segment_seed(key_fn, seed, index):
+    """Chain seed of one segment in the seekable layout"""
+    return key_fn(seed, b'segment:%d' % index)
+
+
+def permutation_seed(keys, axis):
+    """16-byte keystream seed of one axis ('x', 'y' or 'z') for keyed-v1 permutations"""
+    material = (str(keys['H_md5']) + str(keys['H_sha'])).encode('utf-8')
+    return hashlib.blake2b(material, digest_size=16,
+                           person=b'MIE-perm-' + axis.encode('ascii')).digest()
+
+
+def permutation_sources(keys, length, perm_mode=PERM_ARGSORT):
+    """
+    Per-axis (z, y, x) permutation sources: 3D Sine Map sequences of
+    ``length`` for argsort, keyed seeds for keyed-v1 (no float sequences)
+    """
+    if perm_mode == PERM_KEYED:
+        return tuple(permutation_seed(keys, axis) for axis in 'zyx')
+    return generate_3d_sine_sequences(keys['x0'], keys['y0'], keys['z0'],
+                                      keys['a'], keys['b'], keys['c'], length)
+
+
+def apply_md5_diffusion(byte_array, H_md5, chunk_size=1024, suite=None,
+                        segment_size=None, first_segment=0):
+    """Apply MD5-based XOR diffusion (or the suite's XOR layer)"""
+    if segment_size and segment_size % chunk_size:
+        raise ValueError(f"Segment size {segment_size} must be a multiple of the "
+                         f"chunk size {chunk_size}")
+    suite = suite or Md5Sha256Suite(H_md5, '')
+    data = _as_uint8(byte_array)
+    result = np.empty_like(data)
     
-    K_prev = bytes(H_md5, 'utf-8') if isinstance(H_md5, str) else bytes(H_md5)
+    K_prev = suite.xor_seed
+    prev_chunk = b''
     
-    for i in range(0, len(byte_array), chunk_size):
-        chunk = bytes(byte_array[i:i+chunk_size])
-        K = md5_hash(K_prev + chunk)
-        K_bytes = hash_to_bytes(K)
-        
-        for j in range(len(chunk)):
-            result[i+j] = chunk[j] ^ K_bytes[j % 16]
+    for i in range(0, len(data), chunk_size):
+        if segment_size and i % segment_size == 0:
+            # Seekable layout: every segment restarts its chain
+            K_prev = segment_seed(suite.xor_key, suite.xor_seed,
+                                  first_segment + i // segment_size)
+            prev_chunk = b''
+        chunk = data[i:i+chunk_size]
+        # Chain on the previous *ciphertext* chunk so the key is recoverable
+        K_bytes = suite.xor_key(K_prev, prev_chunk)
+        key = np.resize(np.frombuffer(K_bytes, dtype=np.uint8), len(chunk))
+        np.bitwise_xor(chunk, key, out=result[i:i+chunk_size])
         
         K_prev = K_bytes
+        prev_chunk = result[i:i+chunk_size]
     
-    return result
-
-
-def apply_sha256_diffusion(byte_array, H_sha):
-    """Apply SHA-256-based addition diffusion"""
-    if not isinstance(byte_array, (bytes, bytearray)):
-        byte_array = bytes(byte_array)
-    result = bytearray(byte_array)
-    chunk_size = 1024
+    return bytearray(result)
+
+
+def apply_sha256_diffusion(byte_array, H_sha, chunk_size=1024, suite=None,
+                           segment_size=None, first_segment=0):
+    """Apply SHA-256-based addition diffusion (or the suite's addition layer)"""
+    if segment_size and segment_size % chunk_size:
+        raise ValueError(f"Segment size {segment_size} must be a multiple of the "
+                         f"chunk size {chunk_size}")
+    suite = suite or Md5Sha256Suite('', H_sha)
+    data = _as_uint8(byte_array)
+    result = np.empty_like(data)
     
-    S_prev = bytes(H_sha, 'utf-8') if isinstance(H_sha, str) else bytes(H_sha)
+    S_prev = suite.add_seed
+    prev_chunk = b''
     
-    for i in range(0, len(byte_array), chunk_size):
-        chunk = bytes(byte_array[i:i+chunk_size])
-        S = sha256_hash(S_prev + chunk)
-        S_bytes = hash_to_bytes(S)
-        
-        for j in range(len(chunk)):
-            result[i+j] = (chunk[j] + S_bytes[j % 32]) % 256
+    for i in range(0, len(data), chunk_size):
+        if segment_size and i % segment_size == 0:
+            # Seekable layout: every segment restarts its chain
+            S_prev = segment_seed(suite.add_key, suite.add_seed,
+                                  first_segment + i // segment_size)
+            prev_chunk = b''
+        chunk = data[i:i+chunk_size]
+        # Chain on the previous *ciphertext* chunk so the key is recoverable
+        S_bytes = suite.add_key(S_prev, prev_chunk)
+        key = np.resize(np.frombuffer(S_bytes, dtype=np.uint8), len(chunk))
+        np.add(chunk, key, out=result[i:i+chunk_size])  # wraps mod 256
         
         S_prev = S_bytes
+        prev_chunk = result[i:i+chunk_size]
     
-    return result
+    return bytearray(result)
 
 
-def apply_hybrid_diffusion(byte_array, H_md5, H_sha):
+def apply_hybrid_diffusion(byte_array, H_md5, H_sha, suite=None):
     """Apply chained hybrid diffusion"""
-    if not isinstance(byte_array, (bytes, bytearray)):
-        byte_array = bytes(byte_array)
-    result = bytearray([0] * len(byte_array))
+    suite = suite or Md5Sha256Suite(H_md5, H_sha)
+    data = _as_uint8(byte_array)
     
-    H_md5_bytes = bytes(H_md5, 'utf-8') if isinstance(H_md5, str) else bytes(H_md5)
-    H_sha_bytes = bytes(H_sha, 'utf-8') if isinstance(H_sha, str) else bytes(H_sha)
-    
-    for i in range(len(byte_array)):
-        prev_byte = result[i-1] if i > 0 else 0
-
-        # Ensure all are strings before concatenation
-        M_hash = md5_hash(str(prev_byte) + str(H_md5))
-        S_hash = sha256_hash(str(prev_byte) + str(H_sha))
-
-        M = hash_to_bytes(M_hash)[i % 16]
-        S = hash_to_bytes(S_hash)[i % 32]
-
-        result[i] = ((byte_array[i] ^ M) + S) % 256
-
+    # Hash rows depend only on the previous output byte: build them once
+    M_table, S_table = hybrid_table_arrays(suite)
     
-    return result
+    # Byte-serial chain; Numba-compiled when available
+    return bytearray(hybrid_chain(data, M_table, S_table))
 
-def modified_decryption(encrypted_images, keys):
+def modified_decryption(encrypted_images, keys, chunk_size=None, profile=None,
+                        suite=DEFAULT_SUITE, engine=None, segment_size=None,
+                        layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Decrypt images using the same keys.
+    ``chunk_size``, ``suite``, ``layout`` and ``perm_mode`` must match the ones used for encryption;
+    the chunk size defaults to the profile's value. With a
+    SharedMemoryEngine, unscrambling and the hybrid layer run on its workers.
     """
+    profile = profile or ACTIVE_PROFILE
+    chunk_size = chunk_size or profile['chunk_size']
+    tuning = {'block_size': profile['block_size'], 'workers': profile['workers'],
+              'layout': layout, 'perm_mode': perm_mode}
     H_md5 = keys['H_md5']
     H_sha = keys['H_sha']
-    x0, y0, z0 = keys['x0'], keys['y0'], keys['z0']
-    p0, q0 = keys['p0'], keys['q0']
-    a, b, c, mu = keys['a'], keys['b'], keys['c'], keys['mu']
+    keyed_suite = get_suite(suite)(H_md5, H_sha)
 
-    encrypted_cube = construct_3d_cube(encrypted_images)
-    h, w, d = encrypted_cube.shape
+    encrypted_cube = construct_3d_cube(encrypted_images, layout)
+    h, w, d = cube_dims(encrypted_cube, layout)
     encrypted_bytes = cube_to_bytes(encrypted_cube)
 
     # Reverse Phase 3: Multi-Layer Hash Diffusion
     print("Reversing Phase 3: Hybrid Diffusion")
-    byte_array_2 = reverse_hybrid_diffusion(encrypted_bytes, H_md5, H_sha)
-    byte_array_1 = reverse_sha256_diffusion(byte_array_2, H_sha)
-    byte_array = reverse_md5_diffusion(byte_array_1, H_md5)
+    if engine is not None:
+        byte_array_2 = engine.reverse_hybrid(encrypted_bytes, *keyed_suite.hybrid_tables())
+    else:
+        byte_array_2 = reverse_hybrid_diffusion(encrypted_bytes, H_md5, H_sha, keyed_suite)
+    byte_array_1 = reverse_sha256_diffusion(byte_array_2, H_sha, chunk_size, keyed_suite,
+                                            segment_size)
+    byte_array = reverse_md5_diffusion(byte_array_1, H_md5, chunk_size, keyed_suite,
+                                       segment_size)
 
     # Reverse Phase 2: 3D Bit-Plane Scrambling
     print("Reversing Phase 2: Bit-Plane Scrambling")
-    cube_scrambled = bytes_to_cube(byte_array, (h, w, d))
-    X1, X2, X3 = generate_3d_sine_sequences(x0, y0, z0, a, b, c, h)
-    cube_3d = reverse_scramble_x_planes(cube_scrambled, X3)
-    cube_3d = reverse_scramble_y_planes(cube_3d, X2)
-    cube_3d = reverse_scramble_z_planes(cube_3d, X1)
-    decrypted_images = extract_images_from_cube(cube_3d, encrypted_images)
+    cube_scrambled = bytes_to_cube(byte_array, encrypted_cube.shape)
+    X1, X2, X3 = permutation_sources(keys, max(h, w, d), perm_mode)
+    if engine is not None:
+        perms = [axis_permutation(X, n, perm_mode) for X, n in zip((X1, X2, X3), (d, w, h))]
+        cube_3d = engine.scramble_cube(cube_scrambled, perms, reverse=True, layout=layout)
+    else:
+        cube_3d = reverse_scramble_x_planes(cube_scrambled, X3, **tuning)
+        cube_3d = reverse_scramble_y_planes(cube_3d, X2, **tuning)
+        cube_3d = reverse_scramble_z_planes(cube_3d, X1, **tuning)
+    decrypted_images = extract_images_from_cube(cube_3d, encrypted_images, layout)
 
     return decrypted_images
 
 
-def reverse_hybrid_diffusion(encrypted_bytes, H_md5, H_sha):
-    """Reverse chained hybrid diffusion"""
-    result = [0] * len(encrypted_bytes)
+def reverse_hybrid_diffusion(encrypted_bytes, H_md5, H_sha, suite=None, offset=0,
+                             prev_byte=0, tables=None):
+    """
+    Reverse chained hybrid diffusion.
+    ``offset``/``prev_byte`` let a slice starting mid-buffer be reversed;
+    ``tables`` from hybrid_table_arrays saves rebuilding them per slice.
+    """
+    if tables is None:
+        tables = hybrid_table_arrays(suite or Md5Sha256Suite(H_md5, H_sha))
+    data = _as_uint8(encrypted_bytes)
+    M_table, S_table = tables
     
-    for i in range(len(encrypted_bytes)):
-        if i == 0:
-            prev_byte = 0
-        else:
-            prev_byte = result[i-1]
-        
-        # Generate same hash components
-        M_hash = md5_hash(str(prev_byte) + str(H_md5))
-        M = hash_to_bytes(M_hash)[i % 16]
-        
-        S_hash = sha256_hash(str(prev_byte)+ str(H_sha))
-        S = hash_to_bytes(S_hash)[i % 32]
-        
-        # Reverse hybrid operation
-        result[i] = ((encrypted_bytes[i] - S) % 256) ^ M
+    # The forward layer chains on its own output, i.e. the ciphertext,
+    # so every position can be reversed independently
+    prev_bytes = np.empty_like(data)
+    prev_bytes[:1] = prev_byte
+    prev_bytes[1:] = data[:-1]
+    positions = np.arange(offset, offset + len(data))
     
-    return result
+    M = M_table[prev_bytes, positions & 15]
+    S = S_table[prev_bytes, positions & 31]
+    return bytearray((data - S) ^ M)
 
-def reverse_sha256_diffusion(byte_array, H_sha):
+def reverse_sha256_diffusion(byte_array, H_sha, chunk_size=1024, suite=None,
+                             segment_size=None, first_segment=0):
     """Reverse SHA-256-based addition diffusion"""
-    result = byte_array.copy()
-    chunk_size = 1024
-    S_prev = H_sha
+    if segment_size and segment_size % chunk_size:
+        raise ValueError(f"Segment size {segment_size} must be a multiple of the "
+                         f"chunk size {chunk_size}")
+    suite = suite or Md5Sha256Suite('', H_sha)
+    data = _as_uint8(byte_array)
+    result = np.empty_like(data)
+    S_prev = suite.add_seed
+    prev_chunk = b''
+
+    for i in range(0, len(data), chunk_size):
+        if segment_size and i % segment_size == 0:
+            # Seekable layout: every segment restarts its chain
+            S_prev = segment_seed(suite.add_key, suite.add_seed,
+                                  first_segment + i // segment_size)
+            prev_chunk = b''
+        chunk = data[i:i+chunk_size]
+        S_bytes = suite.add_key(S_prev, prev_chunk)
+        key = np.resize(np.frombuffer(S_bytes, dtype=np.uint8), len(chunk))
+        # Reverse (addition % 256)
+        np.subtract(chunk, key, out=result[i:i+chunk_size])
+
+        S_prev = S_bytes
+        prev_chunk = chunk
+
+    return bytearray(result)
+
+def reverse_md5_diffusion(byte_array, H_md5, chunk_size=1024, suite=None,
+                          segment_size=None, first_segment=0, positions=None):
+    """
+    Reverse MD5-based XOR diffusion.
+    With ``positions`` only those bytes are returned (as a uint8 array);
+    every chunk key is still chained, but only they are decrypted.
+    """
+    if segment_size and segment_size % chunk_size:
+        raise ValueError(f"Segment size {segment_size} must be a multiple of the "
+                         f"chunk size {chunk_size}")
+    suite = suite or Md5Sha256Suite(H_md5, '')
+    data = _as_uint8(byte_array)
+    K_prev = suite.xor_seed
+    prev_chunk = b''
+    chunk_keys = []
+
+    # The chain runs on the XOR layer's output (our input), so all chunk
+    # keys can be derived first and applied in one vectorized pass
+    for i in range(0, len(data), chunk_size):
+        if segment_size and i % segment_size == 0:
+            # Seekable layout: every segment restarts its chain
+            K_prev = segment_seed(suite.xor_key, suite.xor_seed,
+                                  first_segment + i // segment_size)
+            prev_chunk = b''
+        K_bytes = suite.xor_key(K_prev, prev_chunk)
+        chunk_keys.append(K_bytes)
+        K_prev = K_bytes
+        prev_chunk = data[i:i+chunk_size]
+
+    index = np.arange(len(data)) if positions is None else np.asarray(positions)
+    if not chunk_keys:
+        return bytearray() if positions is None else np.empty(index.shape, dtype=np.uint8)
+    key_table = np.frombuffer(b''.join(chunk_keys), dtype=np.uint8).reshape(len(chunk_keys), -1)
+    # Each chunk's key repeats across the chunk; reverse XOR is the same operation
+    keystream = key_table[index // chunk_size, index % chunk_size % key_table.shape[1]]
+    if positions is None:
+        return bytearray(data ^ keystream)
+    return data[index] ^ keystream
+
+
+def authenticated_encryption(images, password, profile=None, suite=DEFAULT_SUITE,
+                             keys=None, segment_size=None, layout='interleaved',
+                             perm_mode=PERM_ARGSORT):
+    """
+    Encrypt multiple images and seal the result in an authenticated container.
+    With ``segment_size`` the container uses the seekable layout, which
+    decrypt_region can read piecewise. It is rounded up to a multiple of the
+    profile's chunk size; the header records the size actually used.
+    A planar ``layout`` and a non-default ``perm_mode`` are recorded in the
+    header; ``shape`` is always the cube's shape in that layout.
+
+    Returns:
+        Tuple of (encrypted images, container bytes, keys)
+    """
+    profile = profile or ACTIVE_PROFILE
+    if segment_size:
+        # Segments hold whole diffusion chunks (a tuned profile may use large ones)
+        chunk_size = profile['chunk_size']
+        segment_size = -(-segment_size // chunk_size) * chunk_size
+    encrypted_images, keys = modified_encryption(images, password, profile, suite, keys,
+                                                 segment_size=segment_size, layout=layout,
+                                                 perm_mode=perm_mode)
+    encrypted_cube = construct_3d_cube(encrypted_images, layout)
+    meta = {'shape': list(encrypted_cube.shape), 'chunk_size': profile['chunk_size'],
+            'suite': suite}
+    if layout != 'interleaved':
+        # Absent means interleaved, so older containers keep their header
+        meta['layout'] = layout
+    if perm_mode != PERM_ARGSORT:
+        meta['permutation'] = perm_mode
+    payload = encrypted_cube.tobytes()
+    if segment_size:
+        meta['segment_size'] = segment_size
+        payload += segment_tag_table(derive_mac_key(keys), segment_context(meta),
+                                     payload, segment_size)
+    container = pack_container(payload, keys, **meta)
+    return encrypted_images, container, keys
+
+
+def ciphertext_images(meta, ciphertext):
+    """Split verified container ciphertext into encrypted image planes"""
+    shape = tuple(meta['shape'])
+    # Seekable containers carry a segment tag table after the ciphertext
+    encrypted_cube = np.frombuffer(ciphertext[:int(np.prod(shape))],
+                                   dtype=np.uint8).reshape(shape)
+    layout = meta.get('layout', 'interleaved')
+    if layout not in LAYOUT_AXES:
+        raise ValueError(f"Unknown cube layout {layout!r}")
+    if layout == 'planar':
+        return list(encrypted_cube)
+    return [encrypted_cube[:, :, i] for i in range(shape[2])]
+
+
+def authenticated_decryption(container, keys, profile=None):
+    """
+    Verify and decrypt a container produced by authenticated_encryption.
+
+    Raises AuthenticationError for a wrong key or corrupted container
+    before any of the reverse pipeline runs.
+    """
+    meta, ciphertext = open_container(container, keys)
+    encrypted_images = ciphertext_images(meta, ciphertext)
+    chunk_size = meta.get('chunk_size', DEFAULT_PROFILE['chunk_size'])
+    suite = meta.get('suite', Md5Sha256Suite.suite_id)
+    return modified_decryption(encrypted_images, keys, chunk_size, profile, suite,
+                               segment_size=meta.get('segment_size'),
+                               layout=meta.get('layout', 'interleaved'),
+                               perm_mode=meta.get('permutation', PERM_ARGSORT))
+
+
+
+def decrypt_region(container, keys, image_idx, bbox=None):
+    """
+    Decrypt one image, or a rectangle of it, from a seekable container.
 
-    for i in range(0, len(byte_array), chunk_size):
-        chunk = byte_array[i:i+chunk_size]
-        S = sha256_hash(str(S_prev) + str(chunk))
-        S_bytes = hash_to_bytes(S)
+    Only the ciphertext segments holding the requested pixels (found
+    through the inverse scramble permutations) are authenticated and
+    decrypted, so the cost follows the size of the request rather than
+    the size of the group. ``container`` may be bytes or an mmap.
 
-        for j in range(len(chunk)):
-            # Reverse (addition % 256)
-            result[i+j] = (chunk[j] - S_bytes[j % 32]) % 256
+    Args:
+        container: Container from authenticated_encryption(..., segment_size=...)
+        keys: Group key dictionary
+        image_idx: Index of the image within the group
+        bbox: (top, left, bottom, right) pixel box, defaults to the whole image
 
-        S_prev = S
+    Returns:
+        np.ndarray: Decrypted pixels of the box
+    """
+    meta, mac_key, body_offset = check_key(container, keys)
+    if 'segment_size' not in meta:
+        raise ValueError("Container is not seekable; use authenticated_decryption")
+    layout = meta.get('layout', 'interleaved')
+    if layout not in LAYOUT_AXES:
+        raise ValueError(f"Unknown cube layout {layout!r}")
+    axes = LAYOUT_AXES[layout]
+    h, w, d = (meta['shape'][axes[a]] for a in 'xyz')
+    if not 0 <= image_idx < d:
+        raise ValueError(f"Image index {image_idx} out of range for {d} images")
+    top, left, bottom, right = bbox or (0, 0, h, w)
+    if not (0 <= top < bottom <= h and 0 <= left < right <= w):
+        raise ValueError(f"Bounding box {tuple(bbox)} is outside the {h}x{w} image "
+                         "or empty")
+    segment_size, chunk_size = meta['segment_size'], meta['chunk_size']
+    suite = get_suite(meta.get('suite', Md5Sha256Suite.suite_id))(keys['H_md5'], keys['H_sha'])
+    context = segment_context(meta)
+
+    view = memoryview(container)
+    n = h * w * d
+    ciphertext = view[body_offset:body_offset + n]
+    tags = view[body_offset + n:]
+
+    # Inverse permutation plan: where each requested pixel sits in the
+    # scrambled cube (forward scrambling maps out[i, j, k] = in[px[i], py[j], pz[k]])
+    perm_mode = meta.get('permutation', PERM_ARGSORT)
+    X1, X2, X3 = permutation_sources(keys, max(h, w, d), perm_mode)
+    inv_z = inverse_permutation(axis_permutation(X1, d, perm_mode))
+    inv_y = inverse_permutation(axis_permutation(X2, w, perm_mode))
+    inv_x = inverse_permutation(axis_permutation(X3, h, perm_mode))
+    rows = inv_x[top:bottom][:, None]
+    cols = inv_y[left:right][None, :]
+    if layout == 'planar':
+        positions = (inv_z[image_idx] * h + rows) * w + cols
+    else:
+        positions = (rows * w + cols) * d + inv_z[image_idx]
+
+    # Needed segments, merged into runs of consecutive segments so each
+    # run goes through the reverse layers in one call; the requested
+    # positions are grouped by run once (no per-segment scan)
+    flat = positions.ravel()
+    needed, seg_index = np.unique(flat // segment_size, return_inverse=True)
+    breaks = np.diff(needed) != 1
+    run_of_segment = np.concatenate([[0], np.cumsum(breaks)])
+    run_first = needed[np.concatenate([[True], breaks])]
+    run_last = needed[np.concatenate([breaks, [True]])]
+    run = run_of_segment[seg_index.ravel()]
+    order = np.argsort(run, kind='stable')
+    bounds = np.searchsorted(run[order], np.arange(len(run_first) + 1))
+
+    tables = hybrid_table_arrays(suite)
+    region = np.empty(flat.shape, dtype=np.uint8)
+    for r, (first, last) in enumerate(zip(run_first.tolist(), run_last.tolist())):
+        start, stop = first * segment_size, min((last + 1) * segment_size, n)
+        for s in range(first, last + 1):
+            seg_start = s * segment_size
+            prev_byte = ciphertext[seg_start - 1] if seg_start > 0 else 0
+            tag = tags[s * SEGMENT_TAG_SIZE:(s + 1) * SEGMENT_TAG_SIZE]
+            verify_segment(mac_key, context, s, prev_byte,
+                           ciphertext[seg_start:seg_start + segment_size], tag)
+
+        prev_byte = ciphertext[start - 1] if start > 0 else 0
+        plain = reverse_hybrid_diffusion(ciphertext[start:stop], None, None, suite, start,
+                                         prev_byte, tables)
+        plain = reverse_sha256_diffusion(plain, None, chunk_size, suite, segment_size, first)
+        picked = order[bounds[r]:bounds[r + 1]]
+        region[picked] = reverse_md5_diffusion(plain, None, chunk_size, suite, segment_size,
+                                               first, positions=flat[picked] - start)
+    return region.reshape(positions.shape)
+
+def _store_keys(vault, group_id, keys, container_path):
+    if vault is not None:
+        vault.put(group_id, keys, file_fingerprint(container_path))
+
+
+def encrypt_folder(input_folder, output_folder, password, cache=None, profile=None,
+                   suite=DEFAULT_SUITE, vault=None, group_id=None):
+    """
+    Encrypt every image in input_folder into output_folder
+    (encrypted PNGs + authenticated container).
+
+    With an OutputCache, an unchanged group is linked in from the cache
+    instead of being re-encrypted. Unchanged files are recognised from
+    their size/mtime without being read; otherwise the group digest
+    computed for key derivation is used as the fingerprint.
+    With a KeyVault, the keys are stored under ``group_id`` (defaults to
+    the absolute output folder) and the container's fingerprint.
+
+    Returns:
+        Tuple of (keys, container path, cache hit flag)
+    """
+    profile = profile or ACTIVE_PROFILE
+    container_path = os.path.join(output_folder, CONTAINER_NAME)
+    group_id = group_id or os.path.abspath(output_folder)
+    paths = list_image_files(input_folder)
+
+    if cache is not None:
+        kid = key_id(password)
+        version = cipher_version(FORMAT_VERSION, suite, profile['chunk_size'])
+        fingerprint = cache.known_fingerprint(paths, kid)
+        hit = cache.lookup(cache_key(fingerprint, kid, version)) if fingerprint else None
+        if hit:
+            entry, meta = hit
+            cache.link_into(entry, meta, output_folder)
+            _store_keys(vault, group_id, meta['keys'], container_path)
+            return meta['keys'], container_path, True
+
+    images = load_images(input_folder)
+    if not images:
+        raise ValueError(f"No images found in {input_folder}")
+    keys = derive_keys(images, password, suite)
+
+    if cache is not None:
+        fingerprint = group_fingerprint(keys, suite)
+        cache.remember_fingerprint(paths, kid, fingerprint)
+        key = cache_key(fingerprint, kid, version)
+        hit = cache.lookup(key)
+        if hit:
+            entry, meta = hit
+            cache.link_into(entry, meta, output_folder)
+            _store_keys(vault, group_id, keys, container_path)
+            return keys, container_path, True
+
+    encrypted_images, container, keys = authenticated_encryption(
+        images, password, profile, suite, keys)
+    save_images(encrypted_images, output_folder, "encrypted")
+    write_container(container, container_path)
+
+    if cache is not None:
+        outputs = [os.path.join(output_folder, f"encrypted_{i+1}.png")
+                   for i in range(len(encrypted_images))]
+        cache.store(key, outputs + [container_path], {'keys': keys})
+    _store_keys(vault, group_id, keys, container_path)
+    return keys, container_path, False
+
+
+def vault_decryption(container_paths, vault, profile=None):
+    """
+    Decrypt many containers with keys looked up in a KeyVault.
+
+    Only each container's tag is read to find its keys, and all keys come
+    from one batched vault lookup before anything is decrypted.
+
+    Yields:
+        Tuple of (container path, decrypted images), in order
+    """
+    fingerprints = [file_fingerprint(path) for path in container_paths]
+    found = vault.find_many(fingerprints)
+    missing = [path for path, fp in zip(container_paths, fingerprints) if fp not in found]
+    if missing:
+        raise ValueError(f"No keys in the vault for {len(missing)} container(s), "
+                         f"e.g. {missing[0]}")
+    for path, fp in zip(container_paths, fingerprints):
+        yield path, authenticated_decryption(read_container(path), found[fp], profile)
+
+
+# Sharded cube mode
+# Very large groups are split into shards of at most ``shard_size`` images.
+# Each shard is its own cube and container with keys derived from the group
+# keys and the shard index, so memory is bounded per shard and any shard can
+# be decrypted on its own.
+def derive_shard_keys(keys, index, suite=DEFAULT_SUITE):
+    """Key dictionary for one shard, derived from the group keys"""
+    material = f"shard:{index}:{keys['H_md5']}:{keys['H_sha']}".encode('utf-8')
+    H_md5, H_sha = get_suite(suite).group_digests(material)
+    return keys_from_digests(H_md5, H_sha)
+
+
+def _run_jobs(fn, jobs, workers):
+    """Run fn(*job) for every job, in a process pool when workers > 1"""
+    if workers <= 1:
+        return [fn(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *job) for job in jobs]
+        return [f.result() for f in futures]
+
+
+def _shard_digests(paths, size, suite):
+    hasher = get_suite(suite).group_hasher()
+    for path in paths:
+        hasher.update(np.asarray(load_image(path, size), dtype=np.uint8).tobytes())
+    return hasher.hexdigests()
+
+
+def _encrypt_shard(index, paths, size, keys, shard_path, profile, suite):
+    images = [load_image(path, size) for path in paths]
+    shard_keys = derive_shard_keys(keys, index, suite)
+    encrypted_images, _ = modified_encryption(images, None, profile, suite, shard_keys)
+    encrypted_cube = construct_3d_cube(encrypted_images)
+    container = pack_container(encrypted_cube.tobytes(), shard_keys,
+                               shape=list(encrypted_cube.shape),
+                               chunk_size=profile['chunk_size'],
+                               suite=suite, shard=index)
+    write_container(container, shard_path)
+    return os.path.basename(shard_path)
+
+
+def sharded_encryption(paths, password, output_folder, shard_size=64, workers=1,
+                       profile=None, suite=DEFAULT_SUITE):
+    """
+    Encrypt a large group of image files shard by shard.
+
+    The group keys come from the password and the per-shard image digests
+    (computed in parallel, one shard in memory per worker). Shards are then
+    encrypted in parallel and written with a manifest to output_folder.
+
+    Returns:
+        Tuple of (group keys, manifest dict)
+    """
+    profile = profile or ACTIVE_PROFILE
+    if not paths:
+        raise ValueError("No images to encrypt")
+    size = image_target_size(paths)
+    groups = [paths[i:i+shard_size] for i in range(0, len(paths), shard_size)]
+
+    print(f"Phase 1: Hybrid Key Generation ({len(groups)} shards)")
+    digests = _run_jobs(_shard_digests, [(g, size, suite) for g in groups], workers)
+    data = bytearray(password.encode('utf-8'))
+    for H_1, H_2 in digests:
+        data.extend(bytes.fromhex(H_1) + bytes.fromhex(H_2))
+    keys = keys_from_digests(*get_suite(suite).group_digests(bytes(data)))
+
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = [(i, g, size, keys, os.path.join(output_folder, f"shard_{i:05d}.miec"),
+             profile, suite) for i, g in enumerate(groups)]
+    files = _run_jobs(_encrypt_shard, jobs, workers)
+
+    manifest = {
+        'mode': 'sharded',
+        'version': SHARDED_MODE_VERSION,
+        'suite': suite,
+        'chunk_size': profile['chunk_size'],
+        'image_size': list(size),
+        'num_images': len(paths),
+        'shard_size': shard_size,
+        'shards': [{'index': i, 'file': f, 'first_image': i * shard_size,
+                    'count': len(g)} for i, (f, g) in enumerate(zip(files, groups))],
+    }
+    manifest_path = os.path.join(output_folder, SHARD_MANIFEST)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return keys, manifest
 
-    return result
 
-def reverse_md5_diffusion(byte_array, H_md5):
-    """Reverse MD5-based XOR diffusion"""
-    result = byte_array.copy()
-    chunk_size = 1024
-    K_prev = H_md5
+def read_manifest(output_folder):
+    """Load the shard manifest written by sharded_encryption"""
+    with open(os.path.join(output_folder, SHARD_MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('mode') != 'sharded' or manifest.get('version') != SHARDED_MODE_VERSION:
+        raise ValueError("Unsupported shard manifest")
+    return manifest
 
-    for i in range(0, len(byte_array), chunk_size):
-        chunk = byte_array[i:i+chunk_size]
-        K = md5_hash(str(K_prev) + str(chunk))
-        K_bytes = hash_to_bytes(K)
 
-        for j in range(len(chunk)):
-            # Reverse XOR (same operation)
-            result[i+j] = chunk[j] ^ K_bytes[j % 16]
+def decrypt_shard(output_folder, keys, index, manifest=None, profile=None):
+    """
+    Decrypt one shard on its own.
+
+    Returns:
+        List of the shard's decrypted images
+    """
+    manifest = manifest or read_manifest(output_folder)
+    entry = manifest['shards'][index]
+    container = read_container(os.path.join(output_folder, entry['file']))
+    # The header is authenticated by authenticated_decryption below
+    if read_header(container)[0].get('shard') != index:
+        raise AuthenticationError(f"Shard file {entry['file']} is not shard {index}")
+    shard_keys = derive_shard_keys(keys, index, manifest['suite'])
+    return authenticated_decryption(container, shard_keys, profile)
 
-        K_prev = K
 
-    return result
+def sharded_decryption(output_folder, keys, workers=1, profile=None):
+    """
+    Decrypt every shard, yielding (shard index, images) in order.
+    At most ``workers`` shards are in flight at a time.
+    """
+    manifest = read_manifest(output_folder)
+    indices = [entry['index'] for entry in manifest['shards']]
+    if workers <= 1:
+        for i in indices:
+            yield i, decrypt_shard(output_folder, keys, i, manifest, profile)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(indices), workers):
+            batch = indices[start:start+workers]
+            futures = [pool.submit(decrypt_shard, output_folder, keys, i, manifest, profile)
+                       for i in batch]
+            for i, future in zip(batch, futures):
+                yield i, future.result()
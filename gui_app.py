@@ -1,11 +1,197 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
-from encryption_module import modified_encryption, modified_decryption
-from utils.image_utils import load_images, save_images
+from encryption_module import modified_encryption, modified_decryption, CONTAINER_NAME
+from utils.image_utils import (load_images, save_images, list_image_files, image_target_size,
+                               load_image, numbered_image_files)
+from utils.performance_metrics import image_entropy, npcr, uaci
+from utils.thumbnails import (
+    THUMB_SIZE,
+    ThumbnailLoader,
+    container_planes,
+    container_tag,
+    map_container,
+)
+import numpy as np
 import os
 import threading
 
+COLUMNS = ("Original", "Encrypted", "Decrypted")
+ROW_HEIGHT = THUMB_SIZE + 16
+POLL_MS = 50
+
+
+class PreviewPanel:
+    """
+    Virtualized grid of original/encrypted/decrypted thumbnails
+
+    Only the rows inside the viewport exist on the canvas. Their thumbnails
+    and metrics are produced by a ThumbnailLoader in the background and
+    drawn by a Tk timer, so scrolling never waits on image decoding.
+    """
+
+    def __init__(self, root, input_folder="input_images",
+                 encrypted_folder="output_encrypted", decrypted_folder="output_decrypted"):
+        self.window = tk.Toplevel(root)
+        self.window.title("Preview")
+        self.window.geometry(f"{3 * (THUMB_SIZE + 8) + 260}x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.originals = list_image_files(input_folder)
+        # Row i pairs the i-th original (load_images order) with *_{i+1}.png
+        self.encrypted_files = numbered_image_files(encrypted_folder, "encrypted")
+        self.decrypted_files = numbered_image_files(decrypted_folder, "decrypted")
+        self.target_size = image_target_size(self.originals) if self.originals else None
+        # Ciphertext is read straight from the mapped container when there is
+        # one, unless PNGs were written after it (GUI runs write no container)
+        self.container = None
+        self.planes = []
+        container_path = os.path.join(encrypted_folder, CONTAINER_NAME)
+        if os.path.exists(container_path) and all(
+                os.path.getmtime(path) <= os.path.getmtime(container_path)
+                for path in self.encrypted_files):
+            self.container = map_container(container_path)
+            self.planes = container_planes(self.container)
+            self.tag = container_tag(self.container)
+        self.count = max(len(self.originals), len(self.planes) or len(self.encrypted_files),
+                         len(self.decrypted_files))
+
+        self.loader = ThumbnailLoader()
+        self.rows = {}     # row index -> {'futures': {...}, 'photos': {...}}
+        self.metrics = {}  # row index -> metrics text
+        self.setup_ui()
+        self.poll_id = self.window.after(POLL_MS, self.poll)
+
+    def setup_ui(self):
+        header = tk.Frame(self.window)
+        header.pack(fill=tk.X)
+        for col, title in enumerate(COLUMNS + ("Metrics",)):
+            tk.Label(header, text=title, font=("Arial", 10, "bold"),
+                     width=THUMB_SIZE // 8 if col < 3 else 30,
+                     anchor="w").pack(side=tk.LEFT, padx=4)
+
+        body = tk.Frame(self.window)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(body, bg="white", highlightthickness=0)
+        scrollbar = tk.Scrollbar(body, command=self.scroll)
+        self.canvas.config(yscrollcommand=scrollbar.set,
+                           scrollregion=(0, 0, 0, self.count * ROW_HEIGHT))
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll("scroll", -e.delta // 120, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll("scroll", 1, "units"))
+        if not self.count:
+            self.canvas.create_text(10, 10, anchor="nw", text="No images to preview")
+
+    def scroll(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def visible_rows(self):
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first = max(0, int(top // ROW_HEIGHT))
+        last = min(self.count, int(bottom // ROW_HEIGHT) + 1)
+        return range(first, last)
+
+    def refresh(self):
+        """Create rows entering the viewport and drop rows leaving it"""
+        visible = set(self.visible_rows())
+        for i in list(self.rows):
+            if i not in visible:
+                self.canvas.delete(f"row{i}")
+                del self.rows[i]
+        for i in sorted(visible - set(self.rows)):
+            self.rows[i] = {'futures': self.request_row(i), 'photos': {}}
+            y = i * ROW_HEIGHT
+            for col in range(len(COLUMNS)):
+                x = col * (THUMB_SIZE + 8)
+                self.canvas.create_rectangle(x, y, x + THUMB_SIZE, y + THUMB_SIZE,
+                                             outline="#ccc", tags=(f"row{i}",))
+            self.canvas.create_text(len(COLUMNS) * (THUMB_SIZE + 8), y, anchor="nw",
+                                    text=self.metrics.get(i, f"Image {i + 1}\n…"),
+                                    tags=(f"row{i}", f"metrics{i}"))
+        self.loader.retain({f for row in self.rows.values() for f in row['futures'].values()})
+
+    def request_row(self, i):
+        futures = {}
+        if i < len(self.originals):
+            futures[0] = self.loader.request_file(self.originals[i])
+        if i < len(self.planes):
+            futures[1] = self.loader.request_array(f"{self.tag}-{i}", self.planes[i])
+        elif i < len(self.encrypted_files):
+            futures[1] = self.loader.request_file(self.encrypted_files[i])
+        if i < len(self.decrypted_files):
+            futures[2] = self.loader.request_file(self.decrypted_files[i])
+        if i not in self.metrics:
+            futures['metrics'] = self.loader.submit(('metrics', i), self.image_metrics, i)
+        return futures
+
+    def encrypted_plane(self, i):
+        if i < len(self.planes):
+            return np.asarray(self.planes[i])
+        if i < len(self.encrypted_files):
+            with Image.open(self.encrypted_files[i]) as img:
+                return np.array(img.convert('L'))
+        return None
+
+    def image_metrics(self, i):
+        """Worker job: metrics text for one row"""
+        lines = [f"Image {i + 1}"]
+        encrypted = self.encrypted_plane(i)
+        if encrypted is None:
+            return "\n".join(lines + ["not encrypted"])
+        lines.append(f"Entropy: {image_entropy(encrypted):.4f}")
+        if i < len(self.originals):
+            original = np.array(load_image(self.originals[i], self.target_size))
+            if original.shape == encrypted.shape:
+                lines.append(f"NPCR: {npcr(original, encrypted):.2f}%")
+                lines.append(f"UACI: {uaci(original, encrypted):.2f}%")
+                if i < len(self.decrypted_files):
+                    with Image.open(self.decrypted_files[i]) as img:
+                        decrypted = np.array(img.convert('L'))
+                    exact = decrypted.shape == original.shape and np.array_equal(decrypted, original)
+                    lines.append("Decrypted: exact" if exact else "Decrypted: differs")
+        return "\n".join(lines)
+
+    def poll(self):
+        """Draw finished thumbnails and metrics (Tk calls stay on this thread)"""
+        for i, row in self.rows.items():
+            for col, future in list(row['futures'].items()):
+                if not future.done():
+                    continue
+                del row['futures'][col]
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                if col == 'metrics':
+                    self.metrics[i] = result if isinstance(result, str) else f"Error: {result}"
+                    self.canvas.itemconfig(f"metrics{i}", text=self.metrics[i])
+                elif not isinstance(result, Exception):
+                    photo = ImageTk.PhotoImage(result)
+                    row['photos'][col] = photo  # Tk does not hold a reference
+                    self.canvas.create_image(col * (THUMB_SIZE + 8), i * ROW_HEIGHT,
+                                             anchor="nw", image=photo, tags=(f"row{i}",))
+        self.poll_id = self.window.after(POLL_MS, self.poll)
+
+    def close(self):
+        self.window.after_cancel(self.poll_id)
+        self.loader.close()
+        self.rows.clear()
+        self.planes = []
+        if self.container is not None:
+            try:
+                self.container.close()
+            except BufferError:
+                pass  # a worker still holds a view; the map closes with it
+        self.window.destroy()
+
+
 class EncryptionApp:
     def __init__(self, root):
         self.root = root
@@ -42,6 +228,9 @@ class EncryptionApp:
         tk.Button(button_frame, text="Decrypt Images",
                  command=self.start_decryption,
                  bg="blue", fg="white").pack(side=tk.LEFT, padx=5)
+
+        tk.Button(button_frame, text="Preview Results",
+                 command=lambda: PreviewPanel(self.root)).pack(side=tk.LEFT, padx=5)
     
     def update_status(self, message, is_error=False):
         color = "red" if is_error else "black"
@@ -88,7 +277,7 @@ class EncryptionApp:
             self.update_status("✅ Encryption completed successfully!")
             messagebox.showinfo("Success", "Images encrypted successfully!")
             
-        except PIL.Image.DecompressionBombError:
+        except Image.DecompressionBombError:
             self.update_status("Image too large! Please use smaller images.", True)
         except Exception as e:
             self.update_status(f"Error during encryption: {str(e)}", True)
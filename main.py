@@ -1,30 +1,38 @@
-from encryption_module import modified_encryption, modified_decryption
+from encryption_module import encrypt_folder, vault_decryption, ciphertext_images
+from utils.container import read_container, open_container
 from utils.image_utils import load_images, save_images
+from utils.key_vault import KeyVault
+from utils.output_cache import OutputCache
 from utils.performance_metrics import evaluate_performance
 import pandas as pd
 import numpy as np
 
 if __name__ == "__main__":
     password = "vamshi123"
-    
-    print("🔹 Loading images...")
-    images = load_images("input_images")
-    print(f"Loaded {len(images)} images.")
+    cache = OutputCache()
+    vault = KeyVault()
     
     # --- ENCRYPTION ---
     print("\n🚀 Starting Encryption...")
-    encrypted_images, keys = modified_encryption(images, password)
-    save_images(encrypted_images, "output_encrypted", "encrypted")
-    print("✅ Encryption completed. Files saved in 'output_encrypted/'.")
+    keys, container_path, cached = encrypt_folder("input_images", "output_encrypted",
+                                                  password, cache, vault=vault)
+    if cached:
+        print("♻️ Input unchanged. Linked cached output into 'output_encrypted/'.")
+    else:
+        print("✅ Encryption completed. Files saved in 'output_encrypted/'.")
     
     # --- DECRYPTION ---
     print("\n🔓 Starting Decryption...")
-    decrypted_images = modified_decryption(encrypted_images, keys)
+    # Keys come from the vault, so this step also works in a later run
+    (_, decrypted_images), = vault_decryption([container_path], vault)
+    container = read_container(container_path)
     save_images(decrypted_images, "output_decrypted", "decrypted")
     print("✅ Decryption completed. Files saved in 'output_decrypted/'.")
     
     # --- PERFORMANCE EVALUATION ---
     print("\n📊 Evaluating Encryption Performance...")
+    images = load_images("input_images")
+    encrypted_images = ciphertext_images(*open_container(container, keys))
     results = []
     for i in range(len(images)):
         original = np.array(images[i])
@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+import pytest
+
+from encryption_module import authenticated_decryption, authenticated_encryption, decrypt_region
+from utils.container import read_header
+
+TUNED_PROFILE = {'chunk_size': 65536, 'workers': 1, 'block_size': 64}
+
+
+@pytest.fixture(scope='module')
+def seekable():
+    rng = np.random.default_rng(7)
+    images = [rng.integers(0, 256, (200, 180), dtype=np.uint8) for _ in range(5)]
+    _, container, keys = authenticated_encryption(images, "pw", profile=TUNED_PROFILE,
+                                                  segment_size=4096)
+    return images, container, keys
+
+
+def test_segment_size_rounded_to_chunk_size(seekable):
+    _, container, _ = seekable
+    assert read_header(container)[0]['segment_size'] == 65536
+
+
+@pytest.mark.parametrize('bbox', [None, (10, 20, 50, 60), (199, 179, 200, 180)])
+def test_region_matches_plaintext(seekable, bbox):
+    images, container, keys = seekable
+    top, left, bottom, right = bbox or (0, 0, 200, 180)
+    np.testing.assert_array_equal(decrypt_region(container, keys, 2, bbox),
+                                  images[2][top:bottom, left:right])
+
+
+@pytest.mark.parametrize('bbox', [(-1, 0, 5, 5), (0, 0, 201, 5), (0, -3, 4, 4),
+                                  (5, 5, 5, 9), (0, 0, 5, 181)])
+def test_invalid_bbox_rejected(seekable, bbox):
+    _, container, keys = seekable
+    with pytest.raises(ValueError, match="Bounding box"):
+        decrypt_region(container, keys, 0, bbox)
+
+
+def best_time(fn, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_whole_image_no_slower_than_full_decryption():
+    # Interleaved: one image's pixels are spread over every segment, the
+    # worst case for a region request
+    rng = np.random.default_rng(11)
+    images = [rng.integers(0, 256, (256, 256), dtype=np.uint8) for _ in range(24)]
+    profile = {'chunk_size': 1024, 'workers': 1, 'block_size': 64}
+    _, container, keys = authenticated_encryption(images, "pw", profile=profile,
+                                                  segment_size=4096)
+    # best_time's first run of each also serves as a warm-up
+    region_time = best_time(lambda: decrypt_region(container, keys, 3), repeats=5)
+    full_time = best_time(lambda: authenticated_decryption(container, keys, profile), repeats=5)
+    assert region_time <= full_time
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from encryption_module import apply_hybrid_diffusion, hybrid_table_arrays
+from utils import jit_kernels
+from utils.hash_utils import Md5Sha256Suite
+from utils.shm_engine import SharedMemoryEngine
+
+SUITE = Md5Sha256Suite('ab' * 16, 'cd' * 32)
+
+
+def random_bytes(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8)
+
+
+def kernel_sets():
+    sets = [pytest.param(jit_kernels.PYTHON_KERNELS, id='python')]
+    sets.append(pytest.param(jit_kernels.NUMBA_KERNELS, id='numba', marks=pytest.mark.skipif(
+        jit_kernels.NUMBA_KERNELS is None, reason="numba is not installed")))
+    return sets
+
+
+@pytest.mark.parametrize('kernels', kernel_sets())
+@pytest.mark.parametrize('n', [4096 * 6 + 17, 4096 * 6])
+def test_scan_matches_serial_chain(kernels, n):
+    data = random_bytes(n)
+    M_table, S_table = hybrid_table_arrays(SUITE)
+    expected = jit_kernels.hybrid_chain(data, M_table, S_table, kernels)
+    actual = jit_kernels.hybrid_scan(data, M_table, S_table, block_size=4096, kernels=kernels)
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_scan_rejects_unaligned_blocks():
+    M_table, S_table = hybrid_table_arrays(SUITE)
+    with pytest.raises(ValueError, match="multiple of 32"):
+        jit_kernels.hybrid_scan(random_bytes(100), M_table, S_table, block_size=100)
+
+
+def test_engine_scan_matches_serial():
+    # More than two 64 KiB blocks, and a ragged last one
+    data = random_bytes(3 * (1 << 16) + 123, seed=1).tobytes()
+    with SharedMemoryEngine(workers=2) as engine:
+        actual = engine.forward_hybrid(data, *SUITE.hybrid_tables())
+    assert actual == apply_hybrid_diffusion(data, None, None, SUITE)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from utils.image_utils import numbered_image_files, save_images
+
+
+def test_numbered_image_files_in_index_order(tmp_path):
+    images = [np.full((4, 4), i, dtype=np.uint8) for i in range(12)]
+    save_images(images, str(tmp_path), "encrypted")
+    paths = numbered_image_files(str(tmp_path), "encrypted")
+    assert [p.rsplit('_', 1)[1] for p in paths] == [f"{i}.png" for i in range(1, 13)]
+
+
+def test_numbered_image_files_stops_at_gap(tmp_path):
+    save_images([np.zeros((2, 2), dtype=np.uint8)] * 3, str(tmp_path), "decrypted")
+    (tmp_path / "decrypted_2.png").unlink()
+    assert len(numbered_image_files(str(tmp_path), "decrypted")) == 1
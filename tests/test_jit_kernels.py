@@ -0,0 +1,11 @@
+import pytest
+
+pytest.importorskip("numba")
+
+from utils import jit_kernels
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_numba_matches_python(seed):
+    # check_parity raises AssertionError on the first differing kernel output
+    assert jit_kernels.check_parity(trials=10, length=1500, seed=seed) == 10
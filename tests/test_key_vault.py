@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from encryption_module import derive_keys, encrypt_folder, vault_decryption
+from utils.hash_utils import CIPHER_SUITES
+from utils.image_utils import load_images
+from utils.key_vault import BATCH_SIZE, RECORD, KeyVault, pack_keys, unpack_keys
+
+
+def random_images(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (12, 10), dtype=np.uint8) for _ in range(count)]
+
+
+@pytest.fixture
+def vault(tmp_path):
+    with KeyVault(str(tmp_path / 'vault.sqlite')) as vault:
+        yield vault
+
+
+@pytest.mark.parametrize('suite', sorted(CIPHER_SUITES))
+def test_pack_unpack_roundtrip(suite):
+    keys = derive_keys(random_images(2), "pw", suite)
+    record = pack_keys(keys)
+    assert len(record) == RECORD.size
+    assert unpack_keys(record) == keys
+
+
+def test_pack_rejects_bad_digest():
+    keys = dict(derive_keys(random_images(1), "pw"), H_md5='ab' * 8 + 'zz')
+    with pytest.raises(ValueError, match="hex"):
+        pack_keys(keys)
+
+
+def test_vault_file_is_private(tmp_path):
+    path = tmp_path / 'private.sqlite'
+    KeyVault(str(path)).close()
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_find_many_spans_batches(vault):
+    keys = [derive_keys(random_images(1, seed), "pw") for seed in range(3)]
+    count = 2 * BATCH_SIZE + 7
+    fingerprints = [i.to_bytes(32, 'big') for i in range(count)]
+    vault.put_many((f'g{i}', keys[i % 3], fp) for i, fp in enumerate(fingerprints))
+    missing = [b'\xff' * 32, b'\xfe' * 32]
+
+    found = vault.find_many(fingerprints + missing)
+    assert len(found) == count
+    assert all(found[fp] == keys[i % 3] for i, fp in enumerate(fingerprints))
+    assert vault.find(missing[0]) is None
+    assert vault.get_many(['g0', 'nope']) == {'g0': keys[0]}
+
+
+@pytest.mark.parametrize('suite', sorted(CIPHER_SUITES))
+def test_vault_decryption_roundtrip(tmp_path, vault, suite):
+    input_folder = tmp_path / 'in'
+    input_folder.mkdir()
+    for i, img in enumerate(random_images(3)):
+        Image.fromarray(img).save(input_folder / f'img{i}.png')
+    containers = []
+    for g in range(2):
+        output_folder = str(tmp_path / f'out{g}')
+        keys, container_path, _ = encrypt_folder(str(input_folder), output_folder, f"pw{g}",
+                                                 suite=suite, vault=vault)
+        assert vault.get(os.path.abspath(output_folder)) == keys
+        containers.append(container_path)
+
+    originals = load_images(str(input_folder))
+    decrypted = list(vault_decryption(containers, vault))
+    assert [path for path, _ in decrypted] == containers
+    for _, images in decrypted:
+        for expected, actual in zip(originals, images):
+            np.testing.assert_array_equal(np.asarray(expected), actual)
+
+
+def test_vault_decryption_missing_keys(tmp_path, vault):
+    input_folder = tmp_path / 'in'
+    input_folder.mkdir()
+    Image.fromarray(random_images(1)[0]).save(input_folder / 'img.png')
+    _, container_path, _ = encrypt_folder(str(input_folder), str(tmp_path / 'out'), "pw")
+    with pytest.raises(ValueError, match="No keys in the vault"):
+        list(vault_decryption([container_path], vault))
@@ -0,0 +1,154 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from encryption_module import (
+    authenticated_decryption,
+    authenticated_encryption,
+    derive_keys,
+    modified_decryption,
+    modified_encryption,
+)
+from utils.bitplane_ops import PERMUTATION_MODES
+from utils.container import (
+    FEATURES_VERSION,
+    FORMAT_VERSION,
+    KCV_SIZE,
+    TAG_SIZE,
+    AuthenticationError,
+    pack_container,
+    read_header,
+)
+
+
+def random_group(seed):
+    rng = np.random.default_rng(seed)
+    h, w = rng.integers(1, 48, 2)
+    count = int(rng.integers(1, 7))
+    return [rng.integers(0, 256, (h, w), dtype=np.uint8) for _ in range(count)]
+
+
+def assert_same_images(expected, actual):
+    assert len(expected) == len(actual)
+    for a, b in zip(expected, actual):
+        np.testing.assert_array_equal(np.asarray(a), np.asarray(b))
+
+
+LAYOUTS = ['interleaved', 'planar']
+
+
+@pytest.mark.parametrize('perm_mode', PERMUTATION_MODES)
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('seed', range(8))
+def test_modified_roundtrip(seed, layout, perm_mode):
+    images = random_group(seed)
+    encrypted, keys = modified_encryption(images, f"pw{seed}", layout=layout,
+                                          perm_mode=perm_mode)
+    assert_same_images(images, modified_decryption(encrypted, keys, layout=layout,
+                                                   perm_mode=perm_mode))
+
+
+@pytest.mark.parametrize('perm_mode', PERMUTATION_MODES)
+@pytest.mark.parametrize('layout', LAYOUTS)
+@pytest.mark.parametrize('seed', range(8))
+def test_authenticated_roundtrip(seed, layout, perm_mode):
+    images = random_group(100 + seed)
+    _, container, keys = authenticated_encryption(images, f"pw{seed}", layout=layout,
+                                                  perm_mode=perm_mode)
+    assert_same_images(images, authenticated_decryption(container, keys))
+
+
+def with_header(container, **changes):
+    """Container with header fields replaced (the tag no longer matches)"""
+    (header_len,) = struct.unpack('>I', container[4:8])
+    meta = dict(json.loads(container[8:8 + header_len]), **changes)
+    header = json.dumps(meta, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return container[:4] + struct.pack('>I', len(header)) + header + container[8 + header_len:]
+
+
+def test_original_layout_keeps_version():
+    _, container, _ = authenticated_encryption(random_group(7), "pw")
+    meta = read_header(container)[0]
+    assert meta['version'] == FORMAT_VERSION
+    assert 'features' not in meta
+
+
+def test_new_layout_is_versioned():
+    _, container, _ = authenticated_encryption(random_group(7), "pw", layout='planar',
+                                               segment_size=1024)
+    meta = read_header(container)[0]
+    assert meta['version'] == FEATURES_VERSION
+    assert meta['features'] == ['layout', 'segment_size']
+    # A reader that only knows the original format refuses it
+    with pytest.raises(AuthenticationError, match="version"):
+        read_header(with_header(container, version=3))
+
+
+def test_unknown_feature_rejected():
+    _, container, _ = authenticated_encryption(random_group(7), "pw", layout='planar')
+    with pytest.raises(AuthenticationError, match="unsupported features"):
+        read_header(with_header(container, features=['layout', 'zstd']))
+
+
+def test_unknown_layout_rejected():
+    images = random_group(7)
+    encrypted, container, keys = authenticated_encryption(images, "pw")
+    meta, _, body_offset = read_header(container)
+    spiral = pack_container(container[body_offset:-TAG_SIZE], keys, shape=meta['shape'],
+                            chunk_size=meta['chunk_size'], suite=meta['suite'],
+                            layout='spiral')
+    with pytest.raises(ValueError, match="Unknown cube layout"):
+        authenticated_decryption(spiral, keys)
+
+
+@pytest.fixture(scope='module')
+def sealed():
+    images = random_group(1000)
+    _, container, keys = authenticated_encryption(images, "correct horse")
+    return images, container, keys
+
+
+def test_wrong_password_rejected(sealed):
+    images, container, _ = sealed
+    with pytest.raises(AuthenticationError, match="Wrong key"):
+        authenticated_decryption(container, derive_keys(images, "wrong horse"))
+
+
+def flip(blob, offset):
+    tampered = bytearray(blob)
+    tampered[offset] ^= 0x01
+    return bytes(tampered)
+
+
+def test_tampered_header_rejected(sealed):
+    _, container, keys = sealed
+    (header_len,) = struct.unpack('>I', container[4:8])
+    # Keep the JSON valid: change a digit of the chunk size
+    header = container[8:8 + header_len]
+    offset = 8 + header.index(b'"chunk_size":') + len(b'"chunk_size":')
+    with pytest.raises(AuthenticationError):
+        authenticated_decryption(flip(container, offset), keys)
+
+
+def test_tampered_kcv_rejected(sealed):
+    _, container, keys = sealed
+    _, _, body_offset = read_header(container)
+    with pytest.raises(AuthenticationError, match="Wrong key"):
+        authenticated_decryption(flip(container, body_offset - KCV_SIZE), keys)
+
+
+@pytest.mark.parametrize('position', [0, -1])
+def test_tampered_ciphertext_rejected(sealed, position):
+    _, container, keys = sealed
+    _, _, body_offset = read_header(container)
+    offset = body_offset if position == 0 else len(container) - TAG_SIZE - 1
+    with pytest.raises(AuthenticationError, match="integrity"):
+        authenticated_decryption(flip(container, offset), keys)
+
+
+def test_tampered_tag_rejected(sealed):
+    _, container, keys = sealed
+    with pytest.raises(AuthenticationError, match="integrity"):
+        authenticated_decryption(flip(container, len(container) - 1), keys)
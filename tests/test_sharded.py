@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from encryption_module import decrypt_shard, sharded_decryption, sharded_encryption
+from utils.container import AuthenticationError
+
+
+def image_files(folder, count, shape=(5, 6)):
+    rng = np.random.default_rng(count)
+    folder.mkdir()
+    paths = []
+    for i in range(count):
+        path = str(folder / f'img{i:03d}.png')
+        Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8)).save(path)
+        paths.append(path)
+    return paths
+
+
+def assert_matches_files(paths, images):
+    assert len(paths) == len(images)
+    for path, image in zip(paths, images):
+        np.testing.assert_array_equal(np.asarray(Image.open(path)), image)
+
+
+@pytest.mark.parametrize('count, shard_size, counts', [
+    (10, 4, [4, 4, 2]),
+    (9, 3, [3, 3, 3]),
+    (3, 8, [3]),
+])
+def test_manifest_shard_boundaries(tmp_path, count, shard_size, counts):
+    paths = image_files(tmp_path / 'in', count)
+    _, manifest = sharded_encryption(paths, "pw", str(tmp_path / 'out'), shard_size)
+    assert manifest['num_images'] == count
+    assert [s['count'] for s in manifest['shards']] == counts
+    assert [s['first_image'] for s in manifest['shards']] == \
+        [i * shard_size for i in range(len(counts))]
+    for s in manifest['shards']:
+        assert os.path.exists(tmp_path / 'out' / s['file'])
+
+
+def test_shards_deeper_than_images_are_tall(tmp_path):
+    # 8 images of 5 rows per shard: the cube is deeper (N) than it is tall (H)
+    paths = image_files(tmp_path / 'in', 10)
+    keys, _ = sharded_encryption(paths, "pw", str(tmp_path / 'out'), shard_size=8)
+    images = []
+    for _, shard_images in sharded_decryption(str(tmp_path / 'out'), keys):
+        images.extend(shard_images)
+    assert_matches_files(paths, images)
+
+
+def test_single_shard_decryption(tmp_path):
+    paths = image_files(tmp_path / 'in', 10)
+    keys, manifest = sharded_encryption(paths, "pw", str(tmp_path / 'out'), shard_size=4)
+    images = decrypt_shard(str(tmp_path / 'out'), keys, 1, manifest)
+    assert_matches_files(paths[4:8], images)
+
+
+def test_swapped_shard_files_rejected(tmp_path):
+    paths = image_files(tmp_path / 'in', 8)
+    out = tmp_path / 'out'
+    keys, manifest = sharded_encryption(paths, "pw", str(out), shard_size=4)
+    first, second = (out / s['file'] for s in manifest['shards'])
+    first.rename(out / 'swap')
+    second.rename(first)
+    (out / 'swap').rename(second)
+    with pytest.raises(AuthenticationError, match="is not shard 0"):
+        decrypt_shard(str(out), keys, 0)
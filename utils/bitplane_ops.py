@@ -1,37 +1,111 @@
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-def construct_3d_cube(images):
+from utils.jit_kernels import fisher_yates
+
+# Cube layouts
+#   interleaved: H x W x N, pixel (i, j) of every image is contiguous (original)
+#   planar:      N x H x W, every image is one contiguous plane
+# Each layout fixes which array axis the X/Y/Z scrambles act on and, through
+# C-order flattening, the byte order seen by the diffusion layers.
+LAYOUT_AXES = {
+    'interleaved': {'x': 0, 'y': 1, 'z': 2},
+    'planar': {'x': 1, 'y': 2, 'z': 0},
+}
+
+# Permutation modes (the version is part of the name, so a future change to
+# the keyed generator gets a new mode rather than new output for old keys)
+#   argsort:  argsort of a float chaotic sequence (original, O(n log n))
+#   keyed-v1: Fisher–Yates driven by a Philox counter-mode keystream keyed
+#             with a 16-byte per-axis seed (O(n), integer-only)
+PERM_ARGSORT = 'argsort'
+PERM_KEYED = 'keyed-v1'
+PERMUTATION_MODES = (PERM_ARGSORT, PERM_KEYED)
+
+def keyed_permutation(seed, n):
+    """
+    Permutation of range(n) from a keyed counter-mode keystream
+
+    Args:
+        seed: 16-byte key of the keystream
+        n: Permutation length
+
+    Returns:
+        np.ndarray: intp permutation indices
+    """
+    key = np.frombuffer(bytes(seed[:16]), dtype='<u8')
+    words = np.random.Philox(key=key).random_raw(n)
+    # swaps[i] uniform on [0, i]; the modulo bias is below (i + 1) / 2**64
+    swaps = (words % np.arange(1, n + 1, dtype=np.uint64)).astype(np.intp)
+    return fisher_yates(swaps)
+
+def axis_permutation(source, n, perm_mode=PERM_ARGSORT):
+    """
+    Permutation indices for one axis of length n
+
+    Args:
+        source: Chaotic sequence (argsort) or 16-byte seed (keyed-v1)
+        n: Axis length
+        perm_mode: One of PERMUTATION_MODES
+    """
+    if perm_mode == PERM_ARGSORT:
+        if len(source) < n:
+            raise ValueError(f"Chaotic sequence length must be >= {n}")
+        return np.argsort(source[:n])
+    if perm_mode == PERM_KEYED:
+        return keyed_permutation(source, n)
+    raise ValueError(f"Unknown permutation mode {perm_mode!r}")
+
+def inverse_permutation(perm_indices):
+    """O(n) inverse of a permutation (same result as argsort)"""
+    perm_indices = np.asarray(perm_indices)
+    inverse = np.empty_like(perm_indices)
+    inverse[perm_indices] = np.arange(len(perm_indices), dtype=perm_indices.dtype)
+    return inverse
+
+def cube_dims(cube, layout='interleaved'):
+    """(height, width, depth) of a cube in the given layout"""
+    axes = LAYOUT_AXES[layout]
+    return cube.shape[axes['x']], cube.shape[axes['y']], cube.shape[axes['z']]
+
+def construct_3d_cube(images, layout='interleaved'):
     """
-    Stack all grayscale images into a 3D cube (H×W×N)
+    Stack all grayscale images into a 3D cube (H×W×N, or N×H×W when planar)
     """
-    imgs = [np.array(img, dtype=np.uint8) for img in images]
+    imgs = [np.asarray(img, dtype=np.uint8) for img in images]
     h, w = imgs[0].shape
     for i, im in enumerate(imgs):
         if im.shape != (h, w):
             raise ValueError(f"Image {i+1} has different shape {im.shape} from {h}x{w}")
-    cube = np.stack(imgs, axis=-1)
+    cube = np.stack(imgs, axis=LAYOUT_AXES[layout]['z'])
     return cube
 
 
 def cube_to_bytes(cube):
-    """Flatten 3D cube to 1D byte list"""
-    return cube.flatten().tolist()
+    """Flatten 3D cube to a 1D byte string"""
+    return np.ascontiguousarray(cube, dtype=np.uint8).tobytes()
 
 def bytes_to_cube(byte_array, shape):
-    """Rebuild 3D cube from byte list"""
+    """Rebuild 3D cube from bytes (or a byte list)"""
+    if isinstance(byte_array, (bytes, bytearray, memoryview)):
+        return np.frombuffer(byte_array, dtype=np.uint8).reshape(shape).copy()
     return np.array(byte_array, dtype=np.uint8).reshape(shape)
 
-def extract_images_from_cube(cube_3d, reference_images):
+def extract_images_from_cube(cube_3d, reference_images, layout='interleaved'):
     """
-    Split a 3D cube (H x W x D) into a list of 2D images (for saving).
+    Split a 3D cube into a list of 2D images (for saving).
     Uses reference_images just to match the number of slices.
+    Planar cubes yield zero-copy views of their planes.
     """
     num_images = len(reference_images)
-    h, w, d = cube_3d.shape
+    h, w, d = cube_dims(cube_3d, layout)
 
     if d < num_images:
         raise ValueError(f"Cube depth {d} < number of images {num_images}")
 
+    if layout == 'planar':
+        return [cube_3d[i] for i in range(num_images)]
+
     extracted = []
     for i in range(num_images):
         # Extract each plane and convert back to uint8
@@ -40,137 +114,184 @@ def extract_images_from_cube(cube_3d, reference_images):
 
     return extracted
 
-def scramble_x_planes(planes: np.ndarray, chaotic_seq):
+def permute_axis(planes: np.ndarray, perm_indices, axis, block_size=64, workers=1):
+    """
+    Gather ``planes`` along ``axis`` by ``perm_indices``, one block at a time
+
+    Equivalent to ``np.take(planes, perm_indices, axis=axis)`` but splits the
+    work along a second axis into blocks of ``block_size`` so each gather stays
+    cache-sized, and spreads the blocks over ``workers`` threads.
+    """
+    perm_indices = np.asarray(perm_indices, dtype=np.intp)
+    split_axis = 1 if axis == 0 else 0
+    n = planes.shape[split_axis]
+    block_size = max(1, int(block_size or n))
+    scrambled = np.empty_like(planes)
+
+    def run(start):
+        index = [slice(None)] * planes.ndim
+        index[split_axis] = slice(start, min(start + block_size, n))
+        index = tuple(index)
+        np.take(planes[index], perm_indices, axis=axis, out=scrambled[index])
+
+    starts = range(0, n, block_size)
+    if workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, starts))
+    else:
+        for start in starts:
+            run(start)
+    return scrambled
+
+def scramble_x_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                      layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Scramble planes along X-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence for generating permutation
+        block_size: Columns permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Scrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[0]:
+    axis = LAYOUT_AXES[layout]['x']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= height dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:height])
-    scrambled = np.zeros_like(planes)
-    for j in range(width):
-        for k in range(depth):
-            values = planes[:, j, k]
-            scrambled[:, j, k] = values[perm_indices]
-    return scrambled
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    return permute_axis(planes, perm_indices, axis, block_size, workers)
 
-def scramble_y_planes(planes: np.ndarray, chaotic_seq):
+def scramble_y_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                      layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Scramble planes along Y-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence for generating permutation
+        block_size: Rows permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Scrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[1]:
+    axis = LAYOUT_AXES[layout]['y']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= width dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:width])
-    scrambled = np.zeros_like(planes)
-    for i in range(height):
-        for k in range(depth):
-            values = planes[i, :, k]
-            scrambled[i, :, k] = values[perm_indices]
-    return scrambled
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    return permute_axis(planes, perm_indices, axis, block_size, workers)
 
-def scramble_z_planes(planes: np.ndarray, chaotic_seq):
+def scramble_z_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                      layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Scramble planes along Z-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence for generating permutation
+        block_size: Rows permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Scrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[2]:
+    axis = LAYOUT_AXES[layout]['z']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= depth dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:depth])
-    scrambled = np.zeros_like(planes)
-    for i in range(height):
-        for j in range(width):
-            values = planes[i, j, :]
-            scrambled[i, j, :] = values[perm_indices]
-    return scrambled
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    return permute_axis(planes, perm_indices, axis, block_size, workers)
 
-def reverse_scramble_x_planes(planes: np.ndarray, chaotic_seq):
+def reverse_scramble_x_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                              layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Reverse the scrambling of planes along X-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence used for original scrambling
+        block_size: Columns permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Unscrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[0]:
+    axis = LAYOUT_AXES[layout]['x']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= height dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:height])
-    reverse_indices = np.argsort(perm_indices)
-    unscrambled = np.zeros_like(planes)
-    for j in range(width):
-        for k in range(depth):
-            values = planes[:, j, k]
-            unscrambled[:, j, k] = values[reverse_indices]
-    return unscrambled
-
-def reverse_scramble_y_planes(planes: np.ndarray, chaotic_seq):
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    reverse_indices = inverse_permutation(perm_indices)
+    return permute_axis(planes, reverse_indices, axis, block_size, workers)
+
+def reverse_scramble_y_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                              layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Reverse the scrambling of planes along Y-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence used for original scrambling
+        block_size: Rows permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Unscrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[1]:
+    axis = LAYOUT_AXES[layout]['y']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= width dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:width])
-    reverse_indices = np.argsort(perm_indices)
-    unscrambled = np.zeros_like(planes)
-    for i in range(height):
-        for k in range(depth):
-            values = planes[i, :, k]
-            unscrambled[i, :, k] = values[reverse_indices]
-    return unscrambled
-
-def reverse_scramble_z_planes(planes: np.ndarray, chaotic_seq):
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    reverse_indices = inverse_permutation(perm_indices)
+    return permute_axis(planes, reverse_indices, axis, block_size, workers)
+
+def reverse_scramble_z_planes(planes: np.ndarray, chaotic_seq, block_size=64, workers=1,
+                              layout='interleaved', perm_mode=PERM_ARGSORT):
     """
     Reverse the scrambling of planes along Z-dimension using chaotic sequence
 
     Args:
-        planes: Input array of shape (height, width, depth)
+        planes: Input array of shape (height, width, depth), or
+            (depth, height, width) for the planar layout
         chaotic_seq: Chaotic sequence used for original scrambling
+        block_size: Rows permuted per block
+        workers: Threads used for the blocks
+        layout: 'interleaved' or 'planar'
+        perm_mode: One of PERMUTATION_MODES; for keyed-v1 ``chaotic_seq``
+            is the axis seed instead
 
     Returns:
         np.ndarray: Unscrambled array with same shape as input
     """
-    if len(chaotic_seq) < planes.shape[2]:
+    axis = LAYOUT_AXES[layout]['z']
+    n = planes.shape[axis]
+    if perm_mode == PERM_ARGSORT and len(chaotic_seq) < n:
         raise ValueError("Chaotic sequence length must be >= depth dimension")
-    height, width, depth = planes.shape
-    perm_indices = np.argsort(chaotic_seq[:depth])
-    reverse_indices = np.argsort(perm_indices)
-    unscrambled = np.zeros_like(planes)
-    for i in range(height):
-        for j in range(width):
-            values = planes[i, j, :]
-            unscrambled[i, j, :] = values[reverse_indices]
-    return unscrambled
+    perm_indices = axis_permutation(chaotic_seq, n, perm_mode)
+    reverse_indices = inverse_permutation(perm_indices)
+    return permute_axis(planes, reverse_indices, axis, block_size, workers)
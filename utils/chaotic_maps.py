@@ -1,6 +1,6 @@
 import numpy as np
-from math import sin, pi
 from typing import Tuple, List, Union
+from utils.jit_kernels import sine_sequences, lasm_sequences
 
 def generate_3d_sine_sequences(x0: float, y0: float, z0: float, 
                              a: float, b: float, c: float, 
@@ -23,26 +23,8 @@ def generate_3d_sine_sequences(x0: float, y0: float, z0: float,
     if not isinstance(length, int) or length <= 0:
         raise ValueError("Length must be a positive integer")
 
-    # Initialize empty lists
-    X1, X2, X3 = [], [], []
-    
-    # Convert to numpy arrays for calculations
-    x, y, z = np.float64(x0), np.float64(y0), np.float64(z0)
-    
-    # Warmup phase
-    for _ in range(1000):
-        x = a * sin(pi*(1-x))*sin(pi*(1-y)) % 1
-        y = b * sin(pi*(1-y))*sin(pi*(1-z)) % 1
-        z = c * sin(pi*(1-z))*sin(pi*(1-x)) % 1
-    
-    # Generate sequences
-    for _ in range(length):
-        x = a * sin(pi*(1-x))*sin(pi*(1-y)) % 1
-        y = b * sin(pi*(1-y))*sin(pi*(1-z)) % 1
-        z = c * sin(pi*(1-z))*sin(pi*(1-x)) % 1
-        X1.append(float(x))
-        X2.append(float(y))
-        X3.append(float(z))
+    # Warmup + generation run in utils.jit_kernels (Numba when available)
+    X1, X2, X3 = sine_sequences(x0, y0, z0, a, b, c, length).tolist()
     
     return X1, X2, X3
 
@@ -57,23 +39,8 @@ def generate_2d_lasm_sequences(p0: float, q0: float, mu: float, length: int) ->
     Returns:
         Tuple[List[float], List[float]]: Two chaotic sequences Y, Z
     """
-    # Initialize empty lists
-    Y, Z = [], []
-    p, q = float(p0), float(q0)
-
-    # Discard first 1000 iterations (transient)
-    for _ in range(1000):
-        p = mu * sin(pi * q) + (4 - mu) * p * (1 - p)
-        q = mu * sin(pi * p) + (4 - mu) * q * (1 - q)
-        p, q = p % 1, q % 1
-
-    # Generate sequences
-    for _ in range(length):
-        p = mu * sin(pi * q) + (4 - mu) * p * (1 - p)
-        q = mu * sin(pi * p) + (4 - mu) * q * (1 - q)
-        p, q = p % 1, q % 1
-        Y.append(p)
-        Z.append(q)
+    # Transient + generation run in utils.jit_kernels (Numba when available)
+    Y, Z = lasm_sequences(p0, q0, mu, length).tolist()
 
     return Y, Z
 
@@ -0,0 +1,200 @@
+import hashlib
+import hmac
+import json
+import os
+import struct
+
+# Authenticated ciphertext container
+#
+#   MAGIC | u32 header length | JSON header | key-check value | ciphertext | tag
+#
+# The tag is a keyed BLAKE2b over everything before it, so a wrong key is
+# rejected from the key-check value alone and corruption is caught in one
+# streaming hash pass, before any chaotic/diffusion work is done.
+MAGIC = b'MIEC'
+FORMAT_VERSION = 1
+# Header fields that change how the payload decodes. A container using any
+# of them is written as FEATURES_VERSION and names them in 'features', so a
+# reader that predates them fails the version check rather than decrypting
+# them as the original layout, and a container needing a feature this
+# reader does not know is rejected by name.
+FEATURES_VERSION = 2
+KNOWN_FEATURES = ('layout', 'permutation', 'segment_size')
+KCV_SIZE = 8
+TAG_SIZE = 32
+STREAM_BLOCK = 1 << 20
+
+
+class AuthenticationError(ValueError):
+    """Raised when a container fails its key check or integrity tag"""
+
+
+def derive_mac_key(keys):
+    """Derive the 32-byte container MAC key from the encryption keys"""
+    material = (str(keys['H_md5']) + str(keys['H_sha'])).encode('utf-8')
+    return hashlib.blake2b(material, digest_size=32, person=b'MIEC-mac-key').digest()
+
+
+def key_check_value(mac_key):
+    """Short public value that lets a wrong key be rejected immediately"""
+    return hashlib.blake2b(b'key-check', key=mac_key, digest_size=KCV_SIZE,
+                           person=b'MIEC-kcv').digest()
+
+
+def _new_tag_hasher(mac_key):
+    return hashlib.blake2b(key=mac_key, digest_size=TAG_SIZE, person=b'MIEC-tag')
+
+
+def _versioned(meta):
+    features = [field for field in KNOWN_FEATURES if field in meta]
+    if features:
+        return dict(meta, version=FEATURES_VERSION, features=features)
+    return dict(meta, version=FORMAT_VERSION)
+
+
+def _encode_header(meta):
+    header = json.dumps(_versioned(meta), sort_keys=True,
+                        separators=(',', ':')).encode('utf-8')
+    return MAGIC + struct.pack('>I', len(header)) + header
+
+
+def pack_container(ciphertext, keys, **meta):
+    """
+    Wrap raw ciphertext bytes into an authenticated container
+
+    Args:
+        ciphertext: Encrypted byte stream (bytes-like)
+        keys: Key dictionary returned by modified_encryption
+        **meta: JSON-serialisable header fields (shape, layout, ...)
+
+    Returns:
+        bytes: Container blob
+    """
+    mac_key = derive_mac_key(keys)
+    prefix = _encode_header(meta) + key_check_value(mac_key)
+    tagger = _new_tag_hasher(mac_key)
+    tagger.update(prefix)
+    tagger.update(ciphertext)
+    return b''.join([prefix, bytes(ciphertext), tagger.digest()])
+
+
+def read_header(blob):
+    """
+    Parse the container header without any key material
+
+    Returns:
+        Tuple of (meta dict, key-check value, ciphertext offset)
+    """
+    view = memoryview(blob)
+    if len(view) < len(MAGIC) + 4 or bytes(view[:4]) != MAGIC:
+        raise AuthenticationError("Not an encrypted image container")
+    (header_len,) = struct.unpack('>I', view[4:8])
+    body_offset = 8 + header_len + KCV_SIZE
+    if len(view) < body_offset + TAG_SIZE:
+        raise AuthenticationError("Container is truncated")
+    try:
+        meta = json.loads(bytes(view[8:8 + header_len]).decode('utf-8'))
+    except ValueError:
+        raise AuthenticationError("Container header is corrupted")
+    if meta.get('version') not in (FORMAT_VERSION, FEATURES_VERSION):
+        raise AuthenticationError(f"Unsupported container version {meta.get('version')}")
+    unknown = [field for field in meta.get('features', []) if field not in KNOWN_FEATURES]
+    if unknown:
+        raise AuthenticationError(f"Container requires unsupported features {unknown}")
+    kcv = bytes(view[8 + header_len:body_offset])
+    return meta, kcv, body_offset
+
+
+def check_key(blob, keys):
+    """Reject a wrong key using only the header (no hashing of the payload)"""
+    meta, kcv, body_offset = read_header(blob)
+    mac_key = derive_mac_key(keys)
+    if not hmac.compare_digest(kcv, key_check_value(mac_key)):
+        raise AuthenticationError("Wrong key for this container")
+    return meta, mac_key, body_offset
+
+
+def open_container(blob, keys):
+    """
+    Verify a container and return its header and ciphertext
+
+    The key check runs first, then a single streaming tag pass over the
+    header and payload. Nothing is decrypted if either check fails.
+
+    Returns:
+        Tuple of (meta dict, memoryview over the ciphertext)
+    """
+    meta, mac_key, body_offset = check_key(blob, keys)
+    view = memoryview(blob)
+    tag_offset = len(view) - TAG_SIZE
+    tagger = _new_tag_hasher(mac_key)
+    for i in range(0, tag_offset, STREAM_BLOCK):
+        tagger.update(view[i:min(i + STREAM_BLOCK, tag_offset)])
+    if not hmac.compare_digest(tagger.digest(), bytes(view[tag_offset:])):
+        raise AuthenticationError("Container integrity check failed")
+    return meta, view[body_offset:tag_offset]
+
+
+# Seekable layout: the payload is the ciphertext followed by a table of
+# per-segment tags, so one segment can be authenticated without reading
+# the rest. Each tag also covers the byte before its segment (the hybrid
+# layer's chaining input) and the header fields (``context``).
+SEGMENT_TAG_SIZE = 16
+
+
+def segment_context(meta):
+    """Canonical bytes of the header fields a segment tag is bound to"""
+    return json.dumps(_versioned(meta), sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def segment_tag(mac_key, context, index, prev_byte, segment):
+    """Keyed tag of one ciphertext segment"""
+    h = hashlib.blake2b(key=mac_key, digest_size=SEGMENT_TAG_SIZE, person=b'MIEC-segment')
+    h.update(context)
+    h.update(struct.pack('>QB', index, prev_byte))
+    h.update(segment)
+    return h.digest()
+
+
+def segment_tag_table(mac_key, context, ciphertext, segment_size):
+    """Concatenated tags of every segment of the ciphertext"""
+    view = memoryview(ciphertext)
+    tags = []
+    for index, start in enumerate(range(0, len(view), segment_size)):
+        prev_byte = view[start - 1] if start > 0 else 0
+        tags.append(segment_tag(mac_key, context, index, prev_byte,
+                                view[start:start + segment_size]))
+    return b''.join(tags)
+
+
+def verify_segment(mac_key, context, index, prev_byte, segment, tag):
+    """Raise AuthenticationError unless ``tag`` matches the segment"""
+    if not hmac.compare_digest(segment_tag(mac_key, context, index, prev_byte, segment),
+                               bytes(tag)):
+        raise AuthenticationError(f"Segment {index} failed its integrity check")
+
+
+def container_fingerprint(blob):
+    """Fingerprint of a container's ciphertext: its 32-byte tag"""
+    return bytes(memoryview(blob)[-TAG_SIZE:])
+
+
+def file_fingerprint(filepath):
+    """container_fingerprint of a container file, reading only its tag"""
+    with open(filepath, 'rb') as f:
+        f.seek(-TAG_SIZE, os.SEEK_END)
+        return f.read(TAG_SIZE)
+
+
+def write_container(blob, filepath):
+    """Write a container blob to disk (temp file + atomic rename)"""
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp_path, filepath)
+
+
+def read_container(filepath):
+    """Read a container blob from disk"""
+    with open(filepath, 'rb') as f:
+        return f.read()
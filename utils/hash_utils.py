@@ -12,3 +12,126 @@ def sha256_hash(data):
 
 def hash_to_bytes(hash_str):
     return bytes.fromhex(hash_str)
+
+
+# Cipher suites
+# A suite supplies the group key digests and the per-layer key material for
+# the three diffusion layers. All methods return raw digest() bytes.
+class GroupHasher:
+    """Streaming hasher producing the (16-byte, 32-byte) group hex digests"""
+
+    def __init__(self, *hashers, split=None):
+        self.hashers = hashers
+        self.split = split
+
+    def update(self, data):
+        for h in self.hashers:
+            h.update(data)
+
+    def hexdigests(self):
+        if self.split is None:
+            return tuple(h.hexdigest() for h in self.hashers)
+        digest = self.hashers[0].digest()
+        return digest[:self.split].hex(), digest[self.split:].hex()
+
+
+class Md5Sha256Suite:
+    """Original MD5 + SHA-256 suite (kept bit-compatible)"""
+    suite_id = 'md5-sha256'
+
+    @staticmethod
+    def group_hasher():
+        return GroupHasher(hashlib.md5(), hashlib.sha256())
+
+    @classmethod
+    def group_digests(cls, data):
+        """Return (H_md5, H_sha) hex digests of the group data"""
+        hasher = cls.group_hasher()
+        hasher.update(data)
+        return hasher.hexdigests()
+
+    def __init__(self, H_md5, H_sha):
+        self.H_md5 = str(H_md5)
+        self.H_sha = str(H_sha)
+        self.xor_seed = self.H_md5.encode('utf-8')
+        self.add_seed = self.H_sha.encode('utf-8')
+
+    def xor_key(self, prev_key, prev_chunk):
+        """16-byte key for the XOR layer"""
+        h = hashlib.md5(prev_key)
+        h.update(prev_chunk)
+        return h.digest()
+
+    def add_key(self, prev_key, prev_chunk):
+        """32-byte key for the addition layer"""
+        h = hashlib.sha256(prev_key)
+        h.update(prev_chunk)
+        return h.digest()
+
+    def hybrid_tables(self):
+        """Per-previous-byte (16-byte M, 32-byte S) rows for the hybrid layer"""
+        M = [hashlib.md5((str(p) + self.H_md5).encode()).digest() for p in range(256)]
+        S = [hashlib.sha256((str(p) + self.H_sha).encode()).digest() for p in range(256)]
+        return M, S
+
+
+class Blake2bSuite:
+    """All layers keyed from one BLAKE2b primitive over the group digests"""
+    suite_id = 'blake2b'
+
+    @staticmethod
+    def group_hasher():
+        return GroupHasher(hashlib.blake2b(digest_size=48, person=b'MIE-group'), split=16)
+
+    @classmethod
+    def group_digests(cls, data):
+        """Return 16- and 32-byte hex digests of the group data"""
+        hasher = cls.group_hasher()
+        hasher.update(data)
+        return hasher.hexdigests()
+
+    def __init__(self, H_md5, H_sha):
+        key = bytes.fromhex(str(H_md5)) + bytes.fromhex(str(H_sha))
+        # Pre-keyed hashers, cloned with .copy() for every chunk
+        self._xor = hashlib.blake2b(key=key, digest_size=16, person=b'MIE-xor')
+        self._add = hashlib.blake2b(key=key, digest_size=32, person=b'MIE-add')
+        self._hybrid = hashlib.blake2b(key=key, digest_size=48, person=b'MIE-hybrid')
+        self.xor_seed = hashlib.blake2b(key=key, digest_size=16, person=b'MIE-xor-iv').digest()
+        self.add_seed = hashlib.blake2b(key=key, digest_size=32, person=b'MIE-add-iv').digest()
+
+    def xor_key(self, prev_key, prev_chunk):
+        """16-byte key for the XOR layer"""
+        h = self._xor.copy()
+        h.update(prev_key)
+        h.update(prev_chunk)
+        return h.digest()
+
+    def add_key(self, prev_key, prev_chunk):
+        """32-byte key for the addition layer"""
+        h = self._add.copy()
+        h.update(prev_key)
+        h.update(prev_chunk)
+        return h.digest()
+
+    def hybrid_tables(self):
+        """Per-previous-byte (16-byte M, 32-byte S) rows for the hybrid layer"""
+        M, S = [], []
+        for p in range(256):
+            h = self._hybrid.copy()
+            h.update(bytes([p]))
+            digest = h.digest()
+            M.append(digest[:16])
+            S.append(digest[16:])
+        return M, S
+
+
+CIPHER_SUITES = {suite.suite_id: suite for suite in (Md5Sha256Suite, Blake2bSuite)}
+DEFAULT_SUITE = Md5Sha256Suite.suite_id
+
+
+def get_suite(suite_id):
+    """Look up a cipher suite class by its ID"""
+    try:
+        return CIPHER_SUITES[suite_id]
+    except KeyError:
+        raise ValueError(f"Unknown cipher suite '{suite_id}'")
@@ -13,6 +13,35 @@ def validate_image_size(img, filename):
         return img.resize(MAX_SIZE)
     return img
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def list_image_files(folder):
+    """Sorted paths of the image files in folder"""
+    if not os.path.exists(folder):
+        return []
+    return [os.path.join(folder, file) for file in sorted(os.listdir(folder))
+            if file.endswith(IMAGE_EXTENSIONS)]
+
+def image_target_size(paths):
+    """
+    Common (width, height) that load_images would resize these files to,
+    read from the image headers only
+    """
+    sizes = []
+    for filepath in paths:
+        with Image.open(filepath) as img:
+            w, h = img.size
+        if w > MAX_SIZE[0] or h > MAX_SIZE[1]:
+            w, h = MAX_SIZE
+        sizes.append((w, h))
+    return min(w for w, h in sizes), min(h for w, h in sizes)
+
+def load_image(filepath, size):
+    """Load one image as grayscale, resized the same way as load_images"""
+    img = Image.open(filepath).convert('L')
+    img = validate_image_size(img, os.path.basename(filepath))
+    return img.resize(size)
+
 def load_images(folder):
     """
     Load and process images from folder
@@ -33,16 +62,14 @@ def load_images(folder):
             return []
         
         # Load all grayscale images
-        for file in sorted(os.listdir(folder)):
-            if file.endswith(('.png', '.jpg', '.jpeg', '.bmp')):
-                filepath = os.path.join(folder, file)
-                img = Image.open(filepath).convert('L')
-                
-                # Validate and resize if needed
-                img = validate_image_size(img, file)
-                
-                sizes.append(img.size)
-                images.append(img)
+        for filepath in list_image_files(folder):
+            img = Image.open(filepath).convert('L')
+            
+            # Validate and resize if needed
+            img = validate_image_size(img, os.path.basename(filepath))
+            
+            sizes.append(img.size)
+            images.append(img)
         
         if len(images) == 0:
             print("⚠️ No images found in", folder)
@@ -62,6 +89,18 @@ def load_images(folder):
         print(f"❌ Error loading images: {str(e)}")
         return []
 
+def numbered_image_files(folder, prefix):
+    """
+    Paths of {prefix}_1.png, {prefix}_2.png, ... as written by save_images,
+    in index order (a plain name sort puts _10 before _2); stops at the first gap
+    """
+    paths = []
+    while True:
+        filepath = os.path.join(folder, f"{prefix}_{len(paths) + 1}.png")
+        if not os.path.exists(filepath):
+            return paths
+        paths.append(filepath)
+
 def save_images(images, output_folder, prefix):
     """
     Save a list of images to the specified output folder with given prefix
@@ -85,8 +124,11 @@ def save_images(images, output_folder, prefix):
             filename = f"{prefix}_{i+1}.png"
             filepath = os.path.join(output_folder, filename)
             
-            # Save the image
-            img.save(filepath)
+            # Save via temp file + rename so a reader (or a hard-linked
+            # cache entry) never sees a half-written file
+            tmp_path = filepath + '.tmp.png'
+            img.save(tmp_path)
+            os.replace(tmp_path, filepath)
             
         print(f"✅ Saved {len(images)} images to {output_folder}/")
             
@@ -0,0 +1,310 @@
+import os
+from math import sin, pi
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional JIT backend for the scalar loops NumPy cannot vectorize: the
+# chaotic map iterations, the byte-chained hybrid diffusion and the
+# Fisher–Yates swap chain of keyed permutations. Numba is
+# used automatically when installed (set MIE_JIT=0 to disable); the
+# pure-Python kernels below give bit-identical results.
+USE_NUMBA = numba is not None and os.environ.get('MIE_JIT', '1') != '0'
+BACKEND = 'numba' if USE_NUMBA else 'python'
+
+
+def _sine_loop(x, y, z, a, b, c, length):
+    out = np.empty((3, length), dtype=np.float64)
+    # Discard first 1000 iterations
+    for _ in range(1000):
+        x = a * sin(pi * (1-x)) * sin(pi * (1-y)) % 1
+        y = b * sin(pi * (1-y)) * sin(pi * (1-z)) % 1
+        z = c * sin(pi * (1-z)) * sin(pi * (1-x)) % 1
+    for i in range(length):
+        x = a * sin(pi * (1-x)) * sin(pi * (1-y)) % 1
+        y = b * sin(pi * (1-y)) * sin(pi * (1-z)) % 1
+        z = c * sin(pi * (1-z)) * sin(pi * (1-x)) % 1
+        out[0, i] = x
+        out[1, i] = y
+        out[2, i] = z
+    return out
+
+
+def _lasm_loop(p, q, mu, length):
+    out = np.empty((2, length), dtype=np.float64)
+    # Discard first 1000 iterations (transient)
+    for _ in range(1000):
+        p = mu * sin(pi * q) + (4 - mu) * p * (1 - p)
+        q = mu * sin(pi * p) + (4 - mu) * q * (1 - q)
+        p, q = p % 1, q % 1
+    for i in range(length):
+        p = mu * sin(pi * q) + (4 - mu) * p * (1 - p)
+        q = mu * sin(pi * p) + (4 - mu) * q * (1 - q)
+        p, q = p % 1, q % 1
+        out[0, i] = p
+        out[1, i] = q
+    return out
+
+
+def _hybrid_loop(data, M_table, S_table, prev_byte):
+    out = np.empty_like(data)
+    for i in range(data.shape[0]):
+        prev_byte = ((data[i] ^ M_table[prev_byte, i & 15])
+                     + S_table[prev_byte, i & 31]) & 255
+        out[i] = prev_byte
+    return out
+
+
+def _hybrid_python(data, M_table, S_table, prev_byte):
+    # Same chain as _hybrid_loop on bytes objects, which CPython indexes
+    # much faster than NumPy scalars
+    data = data.tobytes()
+    M_rows = [bytes(row) for row in M_table]
+    S_rows = [bytes(row) for row in S_table]
+    out = bytearray(len(data))
+    prev_byte = int(prev_byte)
+    for i in range(len(data)):
+        prev_byte = ((data[i] ^ M_rows[prev_byte][i & 15])
+                     + S_rows[prev_byte][i & 31]) & 255
+        out[i] = prev_byte
+    return np.frombuffer(out, dtype=np.uint8)
+
+
+# Block transition maps for the parallel hybrid scan: map[s] is the chain
+# state after the block when it is entered in state s. Starting states
+# merge as the chain runs, so only the distinct ones are stepped (deduped
+# every 32 bytes); once one is left the map costs the same as the chain.
+def _hybrid_map_loop(data, M_table, S_table):
+    owner = np.arange(256)
+    active = np.arange(256).astype(np.uint8)
+    slot = np.empty(256, dtype=np.int64)
+    remap = np.empty(256, dtype=np.int64)
+    m = 256
+    for i in range(data.shape[0]):
+        for a in range(m):
+            s = active[a]
+            active[a] = ((data[i] ^ M_table[s, i & 15]) + S_table[s, i & 31]) & 255
+        if (i & 31) == 31 and m > 1:
+            slot[:] = -1
+            new_m = 0
+            for a in range(m):
+                v = active[a]
+                if slot[v] < 0:
+                    slot[v] = new_m
+                    active[new_m] = v
+                    new_m += 1
+                remap[a] = slot[v]
+            for k in range(256):
+                owner[k] = remap[owner[k]]
+            m = new_m
+    out = np.empty(256, dtype=np.uint8)
+    for k in range(256):
+        out[k] = active[owner[k]]
+    return out
+
+
+def _hybrid_map_python(data, M_table, S_table):
+    # Vectorized over the distinct states; the scalar chain finishes the
+    # block once they have merged into one
+    owner = np.arange(256)
+    active = np.arange(256, dtype=np.uint8)
+    i = 0
+    while i < data.shape[0] and len(active) > 1:
+        for j in range(i, min(i + 32, data.shape[0])):
+            # uint8 arithmetic wraps, so this is the chain's & 255
+            active = (data[j] ^ M_table[active, j & 15]) + S_table[active, j & 31]
+        active, inverse = np.unique(active, return_inverse=True)
+        owner = inverse[owner]
+        i += 32
+    if i < data.shape[0]:
+        # i is a multiple of 32, so the chain's position indices line up
+        active = _hybrid_python(data[i:], M_table, S_table, active[0])[-1:]
+    return active[owner]
+
+
+def _fisher_yates_loop(swaps):
+    perm = np.arange(swaps.shape[0])
+    for i in range(swaps.shape[0] - 1, 0, -1):
+        j = swaps[i]
+        tmp = perm[i]
+        perm[i] = perm[j]
+        perm[j] = tmp
+    return perm
+
+
+def _fisher_yates_python(swaps):
+    # Same swaps as _fisher_yates_loop on Python lists
+    swap_list = swaps.tolist()
+    perm = list(range(len(swap_list)))
+    for i in range(len(swap_list) - 1, 0, -1):
+        j = swap_list[i]
+        perm[i], perm[j] = perm[j], perm[i]
+    return np.array(perm, dtype=np.intp)
+
+
+PYTHON_KERNELS = {
+    'sine': _sine_loop,
+    'lasm': _lasm_loop,
+    'hybrid': _hybrid_python,
+    'hybrid_map': _hybrid_map_python,
+    'fisher_yates': _fisher_yates_python,
+}
+
+if numba is not None:
+    NUMBA_KERNELS = {
+        'sine': numba.njit(cache=True)(_sine_loop),
+        'lasm': numba.njit(cache=True)(_lasm_loop),
+        'hybrid': numba.njit(cache=True, nogil=True)(_hybrid_loop),
+        'hybrid_map': numba.njit(cache=True, nogil=True)(_hybrid_map_loop),
+        'fisher_yates': numba.njit(cache=True)(_fisher_yates_loop),
+    }
+else:
+    NUMBA_KERNELS = None
+
+KERNELS = NUMBA_KERNELS if USE_NUMBA else PYTHON_KERNELS
+
+
+def sine_sequences(x0, y0, z0, a, b, c, length, kernels=None):
+    """3D Sine Map sequences as a (3, length) float64 array"""
+    return (kernels or KERNELS)['sine'](float(x0), float(y0), float(z0),
+                                        float(a), float(b), float(c), int(length))
+
+
+def lasm_sequences(p0, q0, mu, length, kernels=None):
+    """2D LASM sequences as a (2, length) float64 array"""
+    return (kernels or KERNELS)['lasm'](float(p0), float(q0), float(mu), int(length))
+
+
+def hybrid_chain(data, M_table, S_table, kernels=None, prev_byte=0):
+    """
+    Forward hybrid diffusion chain
+
+    Args:
+        data: uint8 array
+        M_table: (256, 16) uint8 array
+        S_table: (256, 32) uint8 array
+        prev_byte: Chain state before data[0] (data must then start at a
+            multiple of 32 in the full buffer)
+    """
+    return (kernels or KERNELS)['hybrid'](data, M_table, S_table, np.uint8(prev_byte))
+
+
+def hybrid_block_map(data, M_table, S_table, kernels=None):
+    """
+    Transition map of one block of the hybrid chain
+
+    Returns:
+        np.ndarray: (256,) uint8, the state after the block for each entry state
+    """
+    return (kernels or KERNELS)['hybrid_map'](data, M_table, S_table)
+
+
+def compose_prefix(maps):
+    """
+    Inclusive prefix compositions of block transition maps
+
+    Hillis–Steele scan: ceil(log2(B)) rounds, each one vectorized gather
+    over all blocks, so out[b][s] is the state after blocks 0..b from s.
+
+    Args:
+        maps: (B, 256) uint8 array of block maps in chain order
+    """
+    prefix = np.array(maps, dtype=np.uint8)
+    step = 1
+    while step < len(prefix):
+        # Entering block b's span in the state left by the span before it
+        prefix[step:] = np.take_along_axis(prefix[step:], prefix[:-step].astype(np.intp),
+                                           axis=1)
+        step *= 2
+    return prefix
+
+
+def block_start_states(maps, prev_byte=0):
+    """Chain state entering each block, given the maps of all blocks but the last"""
+    prefix = compose_prefix(maps)
+    return np.concatenate([[prev_byte], prefix[:, prev_byte]]).astype(np.uint8)
+
+
+def hybrid_scan(data, M_table, S_table, block_size=1 << 16, kernels=None):
+    """
+    The forward hybrid chain as a blocked scan (serial reference of the
+    SharedMemoryEngine version): block maps, prefix composition, then
+    every block's chain from its resolved start state
+
+    block_size must be a multiple of 32.
+    """
+    if block_size % 32:
+        raise ValueError("block_size must be a multiple of 32")
+    starts = range(0, len(data), block_size)
+    maps = [hybrid_block_map(data[s:s + block_size], M_table, S_table, kernels)
+            for s in starts[:-1]]
+    states = block_start_states(np.array(maps, dtype=np.uint8).reshape(-1, 256))
+    out = np.empty_like(data)
+    for start, state in zip(starts, states):
+        out[start:start + block_size] = hybrid_chain(data[start:start + block_size],
+                                                     M_table, S_table, kernels, state)
+    return out
+
+
+def fisher_yates(swaps, kernels=None):
+    """
+    Apply a Fisher–Yates swap chain to the identity permutation
+
+    Args:
+        swaps: intp array, swaps[i] in [0, i] is swapped with i for i = n-1 .. 1
+
+    Returns:
+        np.ndarray: Permutation of range(n)
+    """
+    return np.asarray((kernels or KERNELS)['fisher_yates'](swaps), dtype=np.intp)
+
+
+def check_parity(trials=20, length=2000, seed=0):
+    """
+    Compare the Numba and Python kernels on random keys
+
+    Float sequences must match bit for bit, not just approximately.
+
+    Returns:
+        int: Number of trials checked (0 if Numba is not installed)
+    """
+    if NUMBA_KERNELS is None:
+        return 0
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        x0, y0, z0, p0, q0 = rng.integers(0, 256, 5) / 10**8
+        a, b, c = 1 + rng.integers(0, 300, 3) / 100
+        mu = rng.integers(0, 100) / 100
+        for name, args in (('sine', (x0, y0, z0, a, b, c, length)),
+                           ('lasm', (p0, q0, mu, length))):
+            fn = sine_sequences if name == 'sine' else lasm_sequences
+            expected = fn(*args, kernels=PYTHON_KERNELS)
+            actual = fn(*args, kernels=NUMBA_KERNELS)
+            if expected.tobytes() != actual.tobytes():
+                raise AssertionError(f"{name} kernels differ on trial {trial}")
+        data = rng.integers(0, 256, length, dtype=np.uint8)
+        M_table = rng.integers(0, 256, (256, 16), dtype=np.uint8)
+        S_table = rng.integers(0, 256, (256, 32), dtype=np.uint8)
+        if not np.array_equal(hybrid_chain(data, M_table, S_table, PYTHON_KERNELS),
+                              hybrid_chain(data, M_table, S_table, NUMBA_KERNELS)):
+            raise AssertionError(f"hybrid kernels differ on trial {trial}")
+        if not np.array_equal(hybrid_block_map(data, M_table, S_table, PYTHON_KERNELS),
+                              hybrid_block_map(data, M_table, S_table, NUMBA_KERNELS)):
+            raise AssertionError(f"hybrid_map kernels differ on trial {trial}")
+        swaps = (rng.integers(0, 1 << 62, length) % np.arange(1, length + 1)).astype(np.intp)
+        if not np.array_equal(fisher_yates(swaps, PYTHON_KERNELS),
+                              fisher_yates(swaps, NUMBA_KERNELS)):
+            raise AssertionError(f"fisher_yates kernels differ on trial {trial}")
+    return trials
+
+
+if __name__ == "__main__":
+    checked = check_parity()
+    if checked:
+        print(f"✅ Numba and Python kernels agree on {checked} random keys")
+    else:
+        print("⚠️ Numba is not installed; only the Python backend is available")
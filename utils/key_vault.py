@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import struct
+
+# Indexed on-disk key vault
+#
+#   groups(group_id TEXT PRIMARY KEY, fingerprint BLOB, record BLOB)
+#
+# Each record packs the eleven key fields into a fixed 121-byte struct:
+#   u8 record version | 16-byte H_md5 | 32-byte H_sha | 9 x f64 chaotic params
+# The chaotic parameters are stored rather than re-derived so a record
+# always decrypts what it was written for. Groups are found by ID or by
+# ciphertext fingerprint (the container tag, see container_fingerprint).
+# The vault holds key material, so the database file is private to the user.
+VAULT_PATH = os.environ.get(
+    'MIE_KEY_VAULT',
+    os.path.join(os.path.expanduser('~'), '.mie_keys.sqlite'),
+)
+RECORD_VERSION = 1
+RECORD = struct.Struct('<B16s32s9d')
+PARAM_FIELDS = ('x0', 'y0', 'z0', 'p0', 'q0', 'a', 'b', 'c', 'mu')
+# SQLite's default limit on bound parameters is 999
+BATCH_SIZE = 500
+
+
+def pack_keys(keys):
+    """Pack a key dictionary into its binary vault record"""
+    try:
+        H_md5 = bytes.fromhex(keys['H_md5'])
+        H_sha = bytes.fromhex(keys['H_sha'])
+    except ValueError:
+        raise ValueError("Key digests must be hex strings")
+    if len(H_md5) != 16 or len(H_sha) != 32:
+        raise ValueError("Key digests must be 16 and 32 bytes")
+    return RECORD.pack(RECORD_VERSION, H_md5, H_sha,
+                       *(float(keys[field]) for field in PARAM_FIELDS))
+
+
+def unpack_keys(record):
+    """Rebuild the key dictionary from a vault record"""
+    version, H_md5, H_sha, *params = RECORD.unpack(record)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported key record version {version}")
+    keys = {'H_md5': H_md5.hex(), 'H_sha': H_sha.hex()}
+    keys.update(zip(PARAM_FIELDS, params))
+    return keys
+
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+class KeyVault:
+    """SQLite store of group keys, indexed by group ID and ciphertext fingerprint"""
+
+    def __init__(self, path=VAULT_PATH):
+        self.path = path
+        if path != ':memory:' and not os.path.exists(path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS groups ('
+                              'group_id TEXT PRIMARY KEY, fingerprint BLOB, '
+                              'record BLOB NOT NULL) WITHOUT ROWID')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS groups_fingerprint '
+                              'ON groups (fingerprint)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM groups').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, group_id, keys, fingerprint=None):
+        """Store (or replace) the keys of one group"""
+        self.put_many([(group_id, keys, fingerprint)])
+
+    def put_many(self, entries):
+        """
+        Store many groups in a single transaction
+
+        Args:
+            entries: Iterable of (group ID, key dictionary, fingerprint or None)
+        """
+        rows = ((group_id, fingerprint, pack_keys(keys))
+                for group_id, keys, fingerprint in entries)
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO groups '
+                                  '(group_id, fingerprint, record) VALUES (?, ?, ?)', rows)
+
+    def get(self, group_id):
+        """Keys of a group, or None if it is not in the vault"""
+        row = self.conn.execute('SELECT record FROM groups WHERE group_id = ?',
+                                (group_id,)).fetchone()
+        return unpack_keys(row[0]) if row else None
+
+    def get_many(self, group_ids):
+        """
+        Keys of many groups in a few indexed queries
+
+        Returns:
+            dict: group ID -> key dictionary (missing groups are left out)
+        """
+        found = {}
+        for batch in _batches(group_ids):
+            marks = ','.join('?' * len(batch))
+            for group_id, record in self.conn.execute(
+                    f'SELECT group_id, record FROM groups WHERE group_id IN ({marks})', batch):
+                found[group_id] = unpack_keys(record)
+        return found
+
+    def find(self, fingerprint):
+        """Keys of the group whose ciphertext has this fingerprint, or None"""
+        row = self.conn.execute('SELECT record FROM groups WHERE fingerprint = ?',
+                                (fingerprint,)).fetchone()
+        return unpack_keys(row[0]) if row else None
+
+    def find_many(self, fingerprints):
+        """
+        Keys for many ciphertext fingerprints in a few indexed queries
+
+        Returns:
+            dict: fingerprint -> key dictionary (unknown fingerprints are left out)
+        """
+        found = {}
+        for batch in _batches(fingerprints):
+            marks = ','.join('?' * len(batch))
+            for fingerprint, record in self.conn.execute(
+                    f'SELECT fingerprint, record FROM groups WHERE fingerprint IN ({marks})',
+                    batch):
+                found[bytes(fingerprint)] = unpack_keys(record)
+        return found
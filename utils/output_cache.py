@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Content-addressed output cache
+#
+#   <root>/objects/<cache key>/   cached output files + entry.json
+#   <root>/stat_index.json        (path, size, mtime) signature -> fingerprint
+#
+# The cache key combines the group fingerprint, a password-derived key ID and
+# the cipher version, so changing any of them is a miss. Entries hold key
+# material, so the cache root is created private to the user.
+CACHE_DIR = os.environ.get(
+    'MIE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'mie'),
+)
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+ENTRY_FILE = 'entry.json'
+
+
+def key_id(password):
+    """Short identifier of a password (not reversible to the password)"""
+    return hashlib.blake2b(password.encode('utf-8'), digest_size=16,
+                           person=b'MIE-key-id').hexdigest()
+
+
+def group_fingerprint(keys, suite):
+    """Fingerprint of a group from the digests computed for key derivation"""
+    material = f"{suite}:{keys['H_md5']}:{keys['H_sha']}".encode('utf-8')
+    return hashlib.blake2b(material, digest_size=32, person=b'MIE-group-fp').hexdigest()
+
+
+def cipher_version(container_version, suite, chunk_size):
+    """Everything about the cipher that changes the output bytes"""
+    return f"{container_version}:{suite}:{chunk_size}"
+
+
+def cache_key(fingerprint, key_identifier, version):
+    """Content address of a group's encrypted output"""
+    material = f"{fingerprint}:{key_identifier}:{version}".encode('utf-8')
+    return hashlib.blake2b(material, digest_size=20, person=b'MIE-cache').hexdigest()
+
+
+def stat_signature(paths, key_identifier):
+    """Cheap change signature from file names, sizes and mtimes (no reads)"""
+    h = hashlib.blake2b(key_identifier.encode('utf-8'), digest_size=20)
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst, falling back to a copy across filesystems"""
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class OutputCache:
+    """Size-bounded LRU cache of encrypted group outputs on local disk"""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'stat_index.json')
+        os.makedirs(self.objects, mode=0o700, exist_ok=True)
+        self._stat_index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._stat_index, f)
+        os.replace(tmp, self.index_path)
+
+    def known_fingerprint(self, paths, key_identifier):
+        """Fingerprint recorded for these exact files, or None if any changed"""
+        return self._stat_index.get(stat_signature(paths, key_identifier))
+
+    def remember_fingerprint(self, paths, key_identifier, fingerprint):
+        """Record the fingerprint for the files' current stat signature"""
+        self._stat_index[stat_signature(paths, key_identifier)] = fingerprint
+        self._save_index()
+
+    def lookup(self, key):
+        """
+        Return (entry dir, entry metadata) for a cache key, or None
+
+        A hit refreshes the entry's LRU timestamp.
+        """
+        entry = os.path.join(self.objects, key)
+        try:
+            with open(os.path.join(entry, ENTRY_FILE), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(entry)
+        return entry, meta
+
+    def store(self, key, files, meta):
+        """
+        Add an entry built from existing output files
+
+        Args:
+            key: Cache key
+            files: Paths of the output files to cache
+            meta: JSON-serialisable entry metadata (keys, file names, ...)
+
+        Returns:
+            str: Entry directory
+        """
+        entry = os.path.join(self.objects, key)
+        tmp = entry + f'.tmp{os.getpid()}'
+        os.makedirs(tmp, mode=0o700, exist_ok=True)
+        for path in files:
+            link_or_copy(path, os.path.join(tmp, os.path.basename(path)))
+        meta = dict(meta, files=[os.path.basename(p) for p in files], stored=time.time())
+        with open(os.path.join(tmp, ENTRY_FILE), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(entry):
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+        self.evict()
+        return entry
+
+    def link_into(self, entry, meta, output_folder):
+        """Link a cached entry's files into output_folder"""
+        os.makedirs(output_folder, exist_ok=True)
+        for name in meta['files']:
+            link_or_copy(os.path.join(entry, name), os.path.join(output_folder, name))
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits max_bytes"""
+        entries = []
+        for name in os.listdir(self.objects):
+            path = os.path.join(self.objects, name)
+            if os.path.isdir(path) and '.tmp' not in name:
+                entries.append((os.path.getmtime(path), _dir_size(path), path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
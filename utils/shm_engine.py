@@ -0,0 +1,233 @@
+import atexit
+import pickle
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.bitplane_ops import LAYOUT_AXES, inverse_permutation
+from utils.jit_kernels import block_start_states, hybrid_block_map, hybrid_chain
+
+# Shared-memory execution engine
+#
+# Cubes live in shared memory segments owned by the parent process. Workers
+# receive only SharedArray descriptors (segment name, shape, dtype, offset)
+# plus small per-task arguments, attach to the segments, and write their
+# results in place, so no cube data is pickled across processes.
+SharedArray = namedtuple('SharedArray', ['name', 'shape', 'dtype', 'offset'])
+
+
+@contextmanager
+def attached(desc):
+    """Attach to a shared segment in a worker and view it as an ndarray"""
+    # Pool workers share the parent's resource tracker, so attaching here
+    # does not hand ownership of the segment to the worker
+    shm = shared_memory.SharedMemory(name=desc.name)
+    try:
+        yield np.ndarray(desc.shape, dtype=desc.dtype, buffer=shm.buf, offset=desc.offset)
+    finally:
+        shm.close()
+
+
+def _block_slices(shape, split_axis, start, stop):
+    index = [slice(None)] * len(shape)
+    index[split_axis] = slice(start, stop)
+    return tuple(index)
+
+
+def _permute_block(src, dst, perm, axis, split_axis, start, stop):
+    """Kernel: gather one block of src along axis into dst"""
+    with attached(src) as s, attached(dst) as d:
+        index = _block_slices(src.shape, split_axis, start, stop)
+        np.take(s[index], perm, axis=axis, out=d[index])
+
+
+def _reverse_hybrid_block(src, dst, tables, start, stop):
+    """Kernel: reverse the hybrid diffusion layer over bytes [start, stop)"""
+    with attached(src) as s, attached(dst) as d, attached(tables) as t:
+        M_table, S_table = t[:, :16], t[:, 16:]
+        data = s[start:stop]
+        prev_bytes = np.empty_like(data)
+        prev_bytes[0] = s[start - 1] if start > 0 else 0
+        prev_bytes[1:] = data[:-1]
+        positions = np.arange(start, stop)
+        d[start:stop] = ((data - S_table[prev_bytes, positions & 31])
+                         ^ M_table[prev_bytes, positions & 15])
+
+
+def _hybrid_map_block(src, tables, maps, index, start, stop):
+    """Kernel: transition map of the forward hybrid chain over [start, stop)"""
+    with attached(src) as s, attached(tables) as t, attached(maps) as m:
+        m[index] = hybrid_block_map(s[start:stop], t[:, :16], t[:, 16:])
+
+
+def _hybrid_chain_block(src, dst, tables, start, stop, prev_byte):
+    """Kernel: forward hybrid chain over [start, stop) from a known state"""
+    with attached(src) as s, attached(dst) as d, attached(tables) as t:
+        d[start:stop] = hybrid_chain(s[start:stop], t[:, :16], t[:, 16:], prev_byte=prev_byte)
+
+
+class SharedMemoryEngine:
+    """
+    Process pool whose scramble/diffusion kernels work on shared memory
+
+    Use as a context manager; every segment the engine created is unlinked
+    on exit, including when a worker crashes mid-job.
+    """
+
+    def __init__(self, workers=2, block_size=64):
+        self.workers = workers
+        self.block_size = block_size
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.segments = {}
+        self.bytes_sent = 0    # pickled task payload, parent -> workers
+        self.tasks_sent = 0
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def empty(self, shape, dtype=np.uint8):
+        """Allocate a shared array; returns its descriptor"""
+        nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.segments[shm.name] = shm
+        return SharedArray(shm.name, tuple(shape), np.dtype(dtype).str, 0)
+
+    def share(self, array):
+        """Copy an array into a new shared segment (the only copy made)"""
+        desc = self.empty(array.shape, array.dtype)
+        self.view(desc)[...] = array
+        return desc
+
+    def view(self, desc):
+        """Parent-side ndarray view of a shared array"""
+        shm = self.segments[desc.name]
+        return np.ndarray(desc.shape, dtype=desc.dtype, buffer=shm.buf, offset=desc.offset)
+
+    def release(self, desc):
+        """Free one shared array"""
+        shm = self.segments.pop(desc.name, None)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        """Shut down the pool and unlink every segment"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        for name in list(self.segments):
+            shm = self.segments.pop(name)
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _submit_all(self, fn, jobs):
+        futures = []
+        for job in jobs:
+            self.bytes_sent += len(pickle.dumps(job, protocol=pickle.HIGHEST_PROTOCOL))
+            self.tasks_sent += 1
+            futures.append(self.pool.submit(fn, *job))
+        for f in futures:
+            f.result()
+
+    def permute_axis(self, src, dst, perm_indices, axis):
+        """Shared-memory equivalent of bitplane_ops.permute_axis (src -> dst)"""
+        perm = np.asarray(perm_indices, dtype=np.intp)
+        split_axis = 1 if axis == 0 else 0
+        n = src.shape[split_axis]
+        step = max(self.block_size, -(-n // (self.workers * 4)))
+        jobs = [(src, dst, perm, axis, split_axis, start, min(start + step, n))
+                for start in range(0, n, step)]
+        self._submit_all(_permute_block, jobs)
+
+    def scramble_cube(self, cube, perms, reverse=False, layout='interleaved'):
+        """
+        Apply the three plane permutations to a cube in shared memory
+
+        Args:
+            cube: Input cube (H x W x N, or N x H x W when planar)
+            perms: (z, y, x) permutation index arrays
+            reverse: Apply the inverse permutations in x, y, z order
+            layout: 'interleaved' or 'planar'
+
+        Returns:
+            np.ndarray: Scrambled cube
+        """
+        src = self.share(cube)
+        dst = self.empty(cube.shape, cube.dtype)
+        try:
+            axes = LAYOUT_AXES[layout]
+            steps = list(zip((axes['z'], axes['y'], axes['x']), perms))
+            if reverse:
+                steps = [(axis, inverse_permutation(perm)) for axis, perm in reversed(steps)]
+            for axis, perm in steps:
+                self.permute_axis(src, dst, perm, axis)
+                src, dst = dst, src
+            return self.view(src).copy()
+        finally:
+            self.release(src)
+            self.release(dst)
+
+    def _share_tables(self, M_table, S_table):
+        rows = np.frombuffer(b''.join(m + s for m, s in zip(M_table, S_table)),
+                             dtype=np.uint8).reshape(256, 48)
+        return self.share(rows)
+
+    def forward_hybrid(self, byte_array, M_table, S_table):
+        """
+        Forward hybrid diffusion layer as a parallel prefix scan
+
+        Workers first compute each block's 256-entry transition map, the
+        parent composes the maps in O(log blocks) vectorized rounds to find
+        every block's entry state, then workers run the blocks' chains.
+        The output is identical to the serial chain.
+        """
+        data = np.frombuffer(bytes(byte_array), dtype=np.uint8)
+        n = len(data)
+        # Blocks start at multiples of 32 so position indices (i & 31) line up
+        step = max(1 << 16, -(-n // (self.workers * 4)))
+        step = -(-step // 32) * 32
+        starts = list(range(0, n, step))
+        src = self.share(data)
+        dst = self.empty(data.shape, np.uint8)
+        tables = self._share_tables(M_table, S_table)
+        maps = self.empty((max(1, len(starts) - 1), 256), np.uint8)
+        try:
+            # The last block's map is never needed
+            self._submit_all(_hybrid_map_block,
+                             [(src, tables, maps, b, start, start + step)
+                              for b, start in enumerate(starts[:-1])])
+            states = block_start_states(self.view(maps)[:len(starts) - 1])
+            self._submit_all(_hybrid_chain_block,
+                             [(src, dst, tables, start, min(start + step, n), int(state))
+                              for start, state in zip(starts, states)])
+            return bytearray(self.view(dst))
+        finally:
+            for desc in (src, dst, tables, maps):
+                self.release(desc)
+
+    def reverse_hybrid(self, encrypted, M_table, S_table):
+        """Reverse the hybrid diffusion layer in parallel ranges"""
+        data = np.frombuffer(bytes(encrypted), dtype=np.uint8)
+        src = self.share(data)
+        dst = self.empty(data.shape, np.uint8)
+        tables = self._share_tables(M_table, S_table)
+        try:
+            n = len(data)
+            step = max(1 << 16, -(-n // (self.workers * 4)))
+            jobs = [(src, dst, tables, start, min(start + step, n))
+                    for start in range(0, n, step)]
+            self._submit_all(_reverse_hybrid_block, jobs)
+            return bytearray(self.view(dst))
+        finally:
+            for desc in (src, dst, tables):
+                self.release(desc)
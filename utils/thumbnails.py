@@ -0,0 +1,203 @@
+import hashlib
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from utils.bitplane_ops import LAYOUT_AXES
+from utils.container import container_fingerprint, read_header
+
+# Lazy thumbnail pipeline for the GUI preview panel
+#
+#   <root>/<hash[:2]>/<hash>_<size>.png   cached thumbnail
+#
+# Thumbnails are addressed by the content hash of their source (file bytes,
+# or the container tag plus image index for ciphertext read from a
+# container), so a changed file is a miss and an unchanged one is never
+# decoded twice. Sources are decoded at reduced size: JPEG via draft(),
+# everything else via reduce() before the final resample.
+THUMB_DIR = os.environ.get(
+    'MIE_THUMB_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'mie', 'thumbs'),
+)
+THUMB_SIZE = 128
+HASH_BLOCK = 1 << 20
+
+
+def file_hash(path):
+    """Content hash of a file (streamed, constant memory)"""
+    h = hashlib.blake2b(digest_size=20, person=b'MIE-thumb')
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def reduced_image(path, size=THUMB_SIZE):
+    """
+    Decode an image file at roughly thumbnail size
+
+    Args:
+        path: Image file
+        size: Longest side of the result in pixels
+
+    Returns:
+        PIL.Image: Grayscale thumbnail
+    """
+    with Image.open(path) as img:
+        # JPEG decodes straight to a 1/2, 1/4 or 1/8 scale; a no-op otherwise
+        img.draft('L', (size, size))
+        img = img.convert('L')
+    factor = min(img.size) // size
+    if factor > 1:
+        img = img.reduce(factor)
+    img.thumbnail((size, size))
+    return img
+
+
+def array_thumbnail(array, size=THUMB_SIZE):
+    """
+    Thumbnail of a 2D uint8 array (e.g. a view into memory-mapped ciphertext)
+
+    Only every step-th row and column is touched, so a view over a mapped
+    container pages in a fraction of the image.
+    """
+    step = max(1, max(array.shape) // size)
+    img = Image.fromarray(np.ascontiguousarray(array[::step, ::step]))
+    img.thumbnail((size, size))
+    return img
+
+
+def container_tag(container):
+    """Hex tag of a container, a content hash of the whole container"""
+    return container_fingerprint(container).hex()
+
+
+def container_planes(container):
+    """
+    Encrypted image planes of a container, read without key material
+
+    Returns:
+        List of 2D uint8 views into ``container`` (zero-copy for an mmap)
+    """
+    meta, _, body_offset = read_header(container)
+    shape = tuple(meta['shape'])
+    n = int(np.prod(shape))
+    cube = np.frombuffer(container, dtype=np.uint8, count=n,
+                         offset=body_offset).reshape(shape)
+    layout = meta.get('layout', 'interleaved')
+    if layout not in LAYOUT_AXES:
+        raise ValueError(f"Unknown cube layout {layout!r}")
+    if layout == 'planar':
+        return list(cube)
+    return [cube[:, :, i] for i in range(shape[2])]
+
+
+def map_container(filepath):
+    """Read-only memory map of a container file"""
+    with open(filepath, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ThumbnailCache:
+    """On-disk thumbnail store keyed by source content hash and size"""
+
+    def __init__(self, root=THUMB_DIR):
+        self.root = root
+
+    def path_for(self, content_hash, size):
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}_{size}.png")
+
+    def get(self, content_hash, size):
+        """Cached thumbnail, or None on a miss"""
+        path = self.path_for(content_hash, size)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                return img
+        except (FileNotFoundError, OSError):
+            return None
+
+    def put(self, content_hash, size, img):
+        """Store a thumbnail (temp file + atomic rename)"""
+        path = self.path_for(content_hash, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp.png"
+        img.save(tmp_path)
+        os.replace(tmp_path, path)
+
+
+class ThumbnailLoader:
+    """
+    Background pool that produces thumbnails on request
+
+    Requests for the same tile share one job, and jobs for tiles that
+    scrolled out of view can be cancelled before they start. PIL releases
+    the GIL while decoding, so threads keep the pool cheap to start.
+    """
+
+    def __init__(self, cache=None, workers=None, size=THUMB_SIZE):
+        self.cache = cache or ThumbnailCache()
+        self.size = size
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1))
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.hashes = {}  # (path, size, mtime) -> content hash
+
+    def _hash_of(self, path):
+        st = os.stat(path)
+        sig = (path, st.st_size, st.st_mtime_ns)
+        if sig not in self.hashes:
+            self.hashes[sig] = file_hash(path)
+        return self.hashes[sig]
+
+    def _file_job(self, path):
+        content_hash = self._hash_of(path)
+        img = self.cache.get(content_hash, self.size)
+        if img is None:
+            img = reduced_image(path, self.size)
+            self.cache.put(content_hash, self.size, img)
+        return img
+
+    def _array_job(self, content_hash, array):
+        img = self.cache.get(content_hash, self.size)
+        if img is None:
+            img = array_thumbnail(array, self.size)
+            self.cache.put(content_hash, self.size, img)
+        return img
+
+    def _submit(self, key, fn, *args):
+        with self.lock:
+            future = self.jobs.get(key)
+            if future is None or future.cancelled():
+                future = self.pool.submit(fn, *args)
+                self.jobs[key] = future
+            return future
+
+    def request_file(self, path):
+        """Future resolving to the thumbnail of an image file"""
+        return self._submit(('file', path), self._file_job, path)
+
+    def request_array(self, content_hash, array):
+        """Future resolving to the thumbnail of an in-memory (or mapped) plane"""
+        return self._submit(('array', content_hash), self._array_job, content_hash, array)
+
+    def submit(self, key, fn, *args):
+        """Run any other per-tile job (e.g. metrics) on the same pool"""
+        return self._submit(('job',) + tuple(key), fn, *args)
+
+    def retain(self, futures):
+        """
+        Drop every job not in ``futures`` (the visible tiles): queued ones
+        are cancelled, finished ones leave memory (the disk cache keeps them)
+        """
+        with self.lock:
+            for key, future in list(self.jobs.items()):
+                if future not in futures and (future.done() or future.cancel()):
+                    del self.jobs[key]
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,53 @@
+import json
+import os
+
+# Per-machine tuning profile
+# Written by tune.py and loaded once when the encryption engine is imported.
+DEFAULT_PROFILE = {
+    'chunk_size': 1024,   # diffusion chunk size (bytes)
+    'workers': 1,         # threads used by the scramble kernels
+    'block_size': 64,     # rows/columns permuted per scramble block
+}
+
+PROFILE_PATH = os.environ.get(
+    'MIE_TUNING_PROFILE',
+    os.path.join(os.path.expanduser('~'), '.mie_tuning.json'),
+)
+
+
+def load_profile(path=PROFILE_PATH):
+    """
+    Load the tuning profile, falling back to defaults for missing keys
+
+    Args:
+        path: Profile file written by save_profile
+
+    Returns:
+        dict: Complete profile
+    """
+    profile = dict(DEFAULT_PROFILE)
+    if not os.path.exists(path):
+        return profile
+    try:
+        with open(path, 'r') as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable tuning profile {path}: {str(e)}")
+        return profile
+    for key in DEFAULT_PROFILE:
+        value = saved.get(key)
+        if isinstance(value, int) and value > 0:
+            profile[key] = value
+    return profile
+
+
+def save_profile(profile, path=PROFILE_PATH):
+    """Save a tuning profile as JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+
+
+ACTIVE_PROFILE = load_profile()
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.image_utils import list_image_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # polling fallback
+    FileSystemEventHandler = object
+    Observer = None
+
+# Hot-folder watch mode
+#
+# Every directory holding images under a watched root (the root itself or
+# its immediate subdirectories) is one group. A group is encrypted once its
+# files have been quiet for the debounce window and their sizes/mtimes are
+# unchanged between two checks. Outputs go to <output>/<group name>/.
+
+
+def write_json_atomic(data, filepath, mode=0o600):
+    """Write JSON via temp file + rename so readers never see partial files"""
+    tmp_path = filepath + '.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, filepath)
+
+
+def group_snapshot(group_dir):
+    """(name, size, mtime) of every image file, used as a stability check"""
+    snapshot = []
+    for path in list_image_files(group_dir):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        snapshot.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+    return tuple(snapshot)
+
+
+def _warm_worker():
+    """Pool initializer: import the engine and run one tiny hybrid pass (compiles its JIT kernel)"""
+    global encrypt_folder, OutputCache
+    from encryption_module import encrypt_folder, apply_hybrid_diffusion
+    from utils.output_cache import OutputCache
+    apply_hybrid_diffusion(b'\0' * 64, '0' * 32, '0' * 64)
+
+
+def _encrypt_group(group_dir, output_dir, password, use_cache):
+    """Worker job: encrypt one group and persist its keys atomically"""
+    start = time.perf_counter()
+    cache = OutputCache() if use_cache else None
+    keys, container_path, cached = encrypt_folder(group_dir, output_dir, password, cache)
+    write_json_atomic(keys, os.path.join(output_dir, 'keys.json'))
+    return {'cached': cached, 'encrypt_seconds': time.perf_counter() - start}
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def on_any_event(self, event):
+        path = event.src_path if not event.is_directory else os.path.join(event.src_path, '_')
+        self.daemon.touch(os.path.dirname(path))
+
+
+class WatchDaemon:
+    """Debounced hot-folder encryptor backed by a pre-warmed process pool"""
+
+    def __init__(self, roots, output_root, password, workers=2, debounce=2.0,
+                 poll_interval=1.0, use_cache=True, status_path='watch_status.json'):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.output_root = output_root
+        self.password = password
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_cache = use_cache
+        self.status_path = status_path
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+        self.lock = threading.Lock()
+        self.dirty = {}      # group dir -> (last event time, snapshot)
+        self.done = {}       # group dir -> snapshot last encrypted
+        self.failed = {}     # group dir -> snapshot that failed (retried once it changes)
+        self.running = {}    # group dir -> (future, first event, submit time, snapshot)
+        self.latencies = []  # seconds from first event to done, most recent 1000
+        self.first_event = {}  # group dir -> time of its first unprocessed event
+        # Force the workers to start (and warm up) before the first group arrives
+        for f in [self.pool.submit(time.sleep, 0) for _ in range(workers)]:
+            f.result()
+
+    def group_for(self, directory):
+        """Map a changed directory to its group, or None if not watched"""
+        directory = os.path.abspath(directory)
+        for root in self.roots:
+            if directory == root:
+                return root
+            if os.path.dirname(directory) == root:
+                return directory
+        return None
+
+    def touch(self, directory):
+        """Record a filesystem event for the group containing directory"""
+        group = self.group_for(directory)
+        if group is None:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.first_event.setdefault(group, now)
+            self.dirty[group] = (now, self.dirty.get(group, (0, None))[1])
+
+    def scan(self):
+        """Polling fallback: mark groups whose snapshot changed"""
+        for root in self.roots:
+            candidates = [root] + [os.path.join(root, d) for d in sorted(os.listdir(root))
+                                   if os.path.isdir(os.path.join(root, d))]
+            for group in candidates:
+                snapshot = group_snapshot(group)
+                if (snapshot and snapshot != self.done.get(group)
+                        and snapshot != self.failed.get(group) and group not in self.dirty):
+                    self.touch(group)
+
+    def dispatch(self):
+        """Submit groups that have been quiet for the debounce window and are stable"""
+        now = time.monotonic()
+        with self.lock:
+            for group, (last_event, prev_snapshot) in list(self.dirty.items()):
+                if group in self.running or now - last_event < self.debounce:
+                    continue
+                snapshot = group_snapshot(group)
+                if not snapshot or snapshot in (self.done.get(group), self.failed.get(group)):
+                    del self.dirty[group]
+                    self.first_event.pop(group, None)
+                    continue
+                if snapshot != prev_snapshot:
+                    # Still changing (or first check): look again next window
+                    self.dirty[group] = (now, snapshot)
+                    continue
+                del self.dirty[group]
+                output_dir = os.path.join(self.output_root, os.path.basename(group))
+                future = self.pool.submit(_encrypt_group, group, output_dir,
+                                          self.password, self.use_cache)
+                self.running[group] = (future, self.first_event.pop(group, now), now, snapshot)
+
+    def collect(self):
+        """Harvest finished jobs and record their latency"""
+        now = time.monotonic()
+        with self.lock:
+            for group, (future, first_event, submitted, snapshot) in list(self.running.items()):
+                if not future.done():
+                    continue
+                del self.running[group]
+                try:
+                    result = future.result()
+                    self.done[group] = snapshot
+                    self.failed.pop(group, None)
+                    self.latencies = (self.latencies + [now - first_event])[-1000:]
+                    print(f"✅ {os.path.basename(group)}: encrypted in "
+                          f"{result['encrypt_seconds']:.2f}s, {now - first_event:.2f}s "
+                          f"after the first change{' (cached)' if result['cached'] else ''}")
+                except Exception as e:
+                    # Not retried until the group's files change
+                    self.failed[group] = snapshot
+                    print(f"❌ {os.path.basename(group)}: {str(e)}")
+
+    def status(self):
+        """Queue depth and latency figures for sizing the daemon"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            status = {
+                'pending_groups': len(self.dirty),
+                'running_groups': len(self.running),
+                'queue_depth': len(self.dirty) + len(self.running),
+                'completed_groups': len(latencies),
+                'failed_groups': len(self.failed),
+            }
+        if latencies:
+            status['latency_p50_s'] = latencies[len(latencies) // 2]
+            status['latency_p95_s'] = latencies[int(len(latencies) * 0.95)]
+            status['latency_max_s'] = latencies[-1]
+        return status
+
+    def run(self):
+        observer = None
+        if Observer is not None:
+            observer = Observer()
+            for root in self.roots:
+                observer.schedule(_EventHandler(self), root, recursive=True)
+            observer.start()
+            print("👀 Watching with inotify (watchdog)")
+        else:
+            print("👀 watchdog not installed, polling every "
+                  f"{self.poll_interval}s")
+        self.scan()  # pick up anything already present
+        try:
+            while True:
+                if observer is None:
+                    self.scan()
+                self.dispatch()
+                self.collect()
+                write_json_atomic(self.status(), self.status_path, mode=0o644)
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping watch mode")
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.pool.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encrypt image groups as they arrive")
+    parser.add_argument('roots', nargs='*', default=['input_images'])
+    parser.add_argument('--output', default='output_encrypted')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help="seconds a group must be quiet before encrypting")
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--status', default='watch_status.json')
+    args = parser.parse_args()
+
+    password = os.environ.get('MIE_PASSWORD')
+    if not password:
+        parser.error("set the MIE_PASSWORD environment variable")
+
+    daemon = WatchDaemon(args.roots, args.output, password, args.workers, args.debounce,
+                         args.poll_interval, not args.no_cache, args.status)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()